@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Local stand-in for the yt-dlp binary, for benchmarks that must not touch the network.
+
+It understands the command lines the app builds (flat-playlist enumeration, format probes, downloads,
+subtitle downloads and cookie exports) and answers them with synthetic but realistically shaped output.
+Point ``YT_DLP_EXEC`` at this file to use it.
+
+Behaviour is tuned per URL with query parameters, falling back to environment variables:
+
+- ``entries`` / ``FAKE_YTDLP_ENTRIES``: videos in a flat-playlist listing (default 100).
+- ``lines`` / ``FAKE_YTDLP_PROGRESS_LINES``: progress lines per download (default 20).
+- ``rate`` / ``FAKE_YTDLP_PROGRESS_RATE``: progress lines per second, 0 for as fast as possible (default 100).
+- ``size`` / ``FAKE_YTDLP_SIZE``: reported download size in bytes (default 10 MB).
+- ``cues`` / ``FAKE_YTDLP_SUB_CUES``: cues per subtitle file (default 200).
+- ``subformat`` / ``FAKE_YTDLP_SUB_FORMAT``: vtt, srt, sbv, ass, ttml or json (default vtt).
+- ``error`` / ``FAKE_YTDLP_ERROR``: 429, bot, network or unavailable, to fail jobs with that error.
+- ``error_rate`` / ``FAKE_YTDLP_ERROR_RATE``: share of jobs that fail when ``error`` is set (default 1).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.parse
+from typing import Optional
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog we are going to talk about python performance today "
+    "and how to measure it properly with benchmarks before changing any code in the scheduler"
+).split()
+ERRORS = {
+    "429": "ERROR: [youtube] {id}: Unable to download webpage: HTTP Error 429: Too Many Requests",
+    "bot": "ERROR: [youtube] {id}: Sign in to confirm you're not a bot. Use --cookies-from-browser or --cookies",
+    "network": "ERROR: [youtube] {id}: Unable to download webpage: <urlopen error [Errno 104] Connection reset>",
+    "unavailable": "ERROR: [youtube] {id}: Video unavailable. This video has been removed by the uploader",
+}
+VALUE_OPTIONS = (
+    "--progress-template",
+    "--cookies",
+    "--cookies-from-browser",
+    "-P",
+    "-f",
+    "--sub-format",
+    "--download-archive",
+    "--audio-format",
+)
+FLAG_OPTIONS = (
+    "--newline",
+    "--flat-playlist",
+    "--lazy-playlist",
+    "--dump-json",
+    "--no-playlist",
+    "--skip-download",
+    "--no-warnings",
+    "--write-subs",
+    "--write-auto-subs",
+    "--force-write-archive",
+    "--ignore-config",
+    "-x",
+)
+
+
+class Settings:
+    def __init__(self, url: str) -> None:
+        parts = urllib.parse.urlsplit(url)
+        self.query = {key: values[-1] for key, values in urllib.parse.parse_qs(parts.query).items()}
+        self.video_id = self.query.get("v") or parts.path.rstrip("/").rsplit("/", 1)[-1] or "benchmark00"
+        self.playlist_id = self.query.get("list") or self.video_id
+
+    def get(self, name: str, default: str) -> str:
+        return self.query.get(name) or os.environ.get(f"FAKE_YTDLP_{name.upper()}") or default
+
+    def number(self, name: str, default: float) -> float:
+        return float(self.get(name, str(default)))
+
+
+def video_id(playlist_id: str, index: int) -> str:
+    return f"{playlist_id[:5]:_<5}{index:06d}"[-11:]
+
+
+def title(rng: random.Random, index: int) -> str:
+    return f"{' '.join(rng.choices(WORDS, k=rng.randint(3, 9))).title()} #{index}"
+
+
+def flat_playlist(settings: Settings) -> None:
+    rng = random.Random(settings.playlist_id)
+    count = int(settings.number("entries", 100))
+    now = 1_700_000_000
+    out = sys.stdout
+    for index in range(count):
+        vid = video_id(settings.playlist_id, index)
+        entry = {
+            "_type": "url",
+            "ie_key": "Youtube",
+            "id": vid,
+            "url": f"https://www.youtube.com/watch?v={vid}",
+            "title": title(rng, index),
+            "description": None,
+            "duration": rng.randint(30, 7200),
+            "channel_id": "UCbenchmark000000000000",
+            "channel": "Benchmark Channel",
+            "channel_url": "https://www.youtube.com/channel/UCbenchmark000000000000",
+            "thumbnails": [{"url": f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg", "height": 360, "width": 480}],
+            "timestamp": now - index * 86400,
+            "view_count": rng.randint(0, 5_000_000),
+            "live_status": None,
+            "playlist_index": index + 1,
+            "__x_forwarded_for_ip": None,
+        }
+        out.write(json.dumps(entry) + "\n")
+
+
+def probe(settings: Settings) -> None:
+    duration = 600
+    formats = [{"format_id": "sb0", "ext": "mhtml", "vcodec": "none", "acodec": "none"}]
+    formats.append({"format_id": "140", "ext": "m4a", "vcodec": "none", "acodec": "mp4a.40.2", "tbr": 129.5})
+    formats.append({"format_id": "251", "ext": "webm", "vcodec": "none", "acodec": "opus", "tbr": 135.1})
+    for format_id, height, tbr in (("160", 144, 80), ("134", 360, 300), ("136", 720, 1200), ("137", 1080, 2500)):
+        formats.append(
+            {
+                "format_id": format_id,
+                "ext": "mp4",
+                "height": height,
+                "vcodec": "avc1.4d401f",
+                "acodec": "none",
+                "tbr": tbr,
+                "filesize": int(tbr * duration * 125),
+            }
+        )
+    info = {"id": settings.video_id, "title": f"Benchmark {settings.video_id}", "duration": duration}
+    print(json.dumps({**info, "formats": formats}))
+
+
+def cue_text(rng: random.Random, count: int) -> list[tuple[float, float, str]]:
+    """Rolling auto-caption style cues: each repeats the tail of the previous one, like YouTube's."""
+    cues = []
+    previous: list[str] = []
+    start = 0.0
+    for _ in range(count):
+        overlap = rng.randint(0, min(3, len(previous)))
+        words = previous[len(previous) - overlap:] + rng.choices(WORDS, k=rng.randint(3, 8))
+        end = start + rng.uniform(1.0, 4.0)
+        cues.append((start, end, " ".join(words)))
+        previous = words
+        start = end
+    return cues
+
+
+def clock(seconds: float, separator: str = ".", hours_width: int = 2) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):0{hours_width}d}:{int(minutes):02d}:{int(secs):02d}{separator}{int(secs % 1 * 1000):03d}"
+
+
+def write_subtitles(path: str, subtitle_format: str, count: int, seed: str = "") -> None:
+    """Write ``count`` synthetic cues to ``path`` in one of the subtitle formats the converter reads."""
+    cues = cue_text(random.Random(seed or path), count)
+    with open(path, "w", encoding="utf-8") as fh:
+        if subtitle_format == "vtt":
+            fh.write("WEBVTT\nKind: captions\nLanguage: en\n\n")
+            for start, end, text in cues:
+                fh.write(f"{clock(start)} --> {clock(end)} align:start position:0%\n{text}\n\n")
+        elif subtitle_format == "srt":
+            for number, (start, end, text) in enumerate(cues, start=1):
+                fh.write(f"{number}\n{clock(start, ',')} --> {clock(end, ',')}\n{text}\n\n")
+        elif subtitle_format == "sbv":
+            for start, end, text in cues:
+                fh.write(f"{clock(start, '.', 1)},{clock(end, '.', 1)}\n{text}\n\n")
+        elif subtitle_format == "ass":
+            fh.write("[Script Info]\nScriptType: v4.00+\n\n[Events]\n")
+            fh.write("Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+            for start, end, text in cues:
+                fh.write(f"Dialogue: 0,{clock(start, '.', 1)[:-1]},{clock(end, '.', 1)[:-1]},Default,,0,0,0,,{text}\n")
+        elif subtitle_format == "ttml":
+            fh.write('<?xml version="1.0" encoding="utf-8"?>\n<tt xmlns="http://www.w3.org/ns/ttml"><body><div>\n')
+            for start, end, text in cues:
+                fh.write(f'<p begin="{clock(start)}" end="{clock(end)}">{text}</p>\n')
+            fh.write("</div></body></tt>\n")
+        elif subtitle_format == "json":
+            events = [
+                {"tStartMs": int(start * 1000), "dDurationMs": int((end - start) * 1000), "segs": [{"utf8": text}]}
+                for start, end, text in cues
+            ]
+            json.dump({"wireMagic": "pb3", "events": events}, fh)
+        else:
+            raise ValueError(f"unknown subtitle format: {subtitle_format}")
+
+
+def fail_if_configured(settings: Settings) -> Optional[int]:
+    error = settings.get("error", "")
+    if not error:
+        return None
+    rate = settings.number("error_rate", 1.0)
+    if random.Random(f"{settings.video_id}:{time.time_ns()}").random() >= rate:
+        return None
+    print(ERRORS.get(error, "ERROR: {id}: " + error).format(id=settings.video_id), file=sys.stderr)
+    return 1
+
+
+def download(settings: Settings, args: argparse.Namespace) -> int:
+    print(f"[youtube] Extracting URL: https://www.youtube.com/watch?v={settings.video_id}")
+    print(f"[youtube] {settings.video_id}: Downloading webpage")
+    failed = fail_if_configured(settings)
+    if failed is not None:
+        return failed
+    directory = args.P or "."
+    name = f"Benchmark video {settings.video_id} [{settings.video_id}]"
+    if args.skip_download:
+        subtitle_format = settings.get("subformat", "vtt")
+        path = os.path.join(directory, f"{name}.en.{subtitle_format}")
+        print("[info] Writing video subtitles to: " + path)
+        os.makedirs(directory, exist_ok=True)
+        write_subtitles(path, subtitle_format, int(settings.number("cues", 200)), settings.video_id)
+        return 0
+
+    size = settings.number("size", 10_000_000)
+    lines = max(1, int(settings.number("lines", 20)))
+    rate = settings.number("rate", 100)
+    path = os.path.join(directory, f"{name}.mp4")
+    print(f"[info] {settings.video_id}: Downloading 1 format(s): 137+140")
+    print(f"[download] Destination: {path}")
+    started = time.monotonic()
+    for line in range(1, lines + 1):
+        if rate > 0:
+            delay = started + line / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        done = size * line / lines
+        elapsed = max(time.monotonic() - started, 1e-3)
+        speed = done / elapsed
+        print(f"[progress] downloading {done:.0f} {size:.0f} NA {speed:.1f} {(size - done) / speed:.0f} NA NA")
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(b"\0" * 1024)
+    print(f"[download] 100% of {size / 1048576:.2f}MiB")
+    return 0
+
+
+def export_cookies(path: str) -> int:
+    expires = int(time.time()) + 30 * 86400
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("# Netscape HTTP Cookie File\n")
+        for name in ("SID", "HSID", "SSID", "LOGIN_INFO"):
+            fh.write(f".youtube.com\tTRUE\t/\tTRUE\t{expires}\t{name}\tbenchmark\n")
+    print("Usage: yt-dlp [OPTIONS] URL [URL...]", file=sys.stderr)
+    return 2
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(add_help=False)
+    for option in VALUE_OPTIONS:
+        parser.add_argument(option)
+    for option in FLAG_OPTIONS:
+        parser.add_argument(option, action="store_true")
+    parser.add_argument("urls", nargs="*")
+    args, _ = parser.parse_known_args(argv)
+    sys.stdout.reconfigure(line_buffering=not args.flat_playlist)
+
+    if not args.urls:
+        if args.cookies and args.cookies_from_browser:
+            return export_cookies(args.cookies)
+        print("Usage: yt-dlp [OPTIONS] URL [URL...]", file=sys.stderr)
+        return 2
+    settings = Settings(args.urls[0])
+    if args.flat_playlist:
+        flat_playlist(settings)
+        return 0
+    if args.dump_json:
+        probe(settings)
+        return 0
+    return download(settings, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
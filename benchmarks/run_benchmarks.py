@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Benchmark the download pipeline against the local yt-dlp stand-in; no network or GUI needed.
+
+Results are one flat JSON object of ``scenario.case.metric`` numbers plus run metadata, so runs from
+different versions can be compared with ``--baseline``:
+
+    python3 benchmarks/run_benchmarks.py --output before.json
+    python3 benchmarks/run_benchmarks.py --baseline before.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional
+
+BENCH_DIR = os.path.abspath(os.path.dirname(__file__))
+FAKE_YT_DLP = os.path.join(BENCH_DIR, "fake_yt_dlp.py")
+# Before importing the core, so every default executable is the stand-in.
+os.environ["YT_DLP_EXEC"] = FAKE_YT_DLP
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from downloader_core import (  # noqa: E402
+    FETCH_BATCH_SIZE,
+    DownloadJob,
+    DownloadScheduler,
+    FlatPlaylistReader,
+    LogBuffer,
+    Metrics,
+    PlaylistFetcher,
+    PlaylistModel,
+    build_download_command,
+    convert_subtitle_files,
+    parse_playlist_query,
+)
+from fake_yt_dlp import write_subtitles  # noqa: E402
+
+Results = dict[str, float]
+
+
+def playlist_url(name: str, entries: int) -> str:
+    return f"https://www.youtube.com/playlist?list={name}&entries={entries}"
+
+
+def video_url(index: int, **params: Any) -> str:
+    query = "".join(f"&{key}={value}" for key, value in params.items())
+    return f"https://www.youtube.com/watch?v=bench{index:06d}{query}"
+
+
+def run_jobs(urls: list[str], concurrency: int, output_dir: str, mode: str = "video", **callbacks: Any) -> float:
+    """Run one scheduler batch to completion and return its wall time."""
+    base_cmd = build_download_command(mode, output_dir=output_dir, single_video=True)
+    jobs = [DownloadJob(index=index, url=url, cmd=[*base_cmd, url]) for index, url in enumerate(urls, start=1)]
+    finished = threading.Event()
+    on_output: Callable[[DownloadJob, str], None] = callbacks.get("on_output") or (lambda job, line: None)
+    scheduler = DownloadScheduler(
+        jobs,
+        concurrency,
+        on_output=on_output,
+        on_state=lambda job: None,
+        on_finished=lambda summary: finished.set(),
+        metrics=callbacks.get("metrics"),
+    )
+    started = time.perf_counter()
+    scheduler.start()
+    finished.wait()
+    return time.perf_counter() - started
+
+
+def bench_playlist_population(quick: bool) -> Results:
+    """Stream flat-playlist listings into the playlist model in GUI-sized batches, then search them."""
+    results: Results = {}
+    for entries in (10, 1_000, 10_000) if quick else (10, 1_000, 100_000):
+        model = PlaylistModel()
+        started = time.perf_counter()
+        reader = FlatPlaylistReader(playlist_url(f"PL{entries}", entries))
+        batch: list[dict[str, Any]] = []
+        first_record: Optional[float] = None
+        for video in reader:
+            if first_record is None:
+                first_record = time.perf_counter() - started
+            batch.append(video)
+            if len(batch) >= FETCH_BATCH_SIZE:
+                model.extend(batch)
+                batch = []
+        model.extend(batch)
+        reader.wait()
+        elapsed = time.perf_counter() - started
+        case = f"playlist_population.{entries}"
+        results[f"{case}.seconds"] = elapsed
+        results[f"{case}.records_per_second"] = len(model) / elapsed
+        results[f"{case}.first_record_seconds"] = first_record or 0.0
+        for name, text in (("word", "python"), ("prefix", "p"), ("bounds", "perf >20m views:10k")):
+            query = parse_playlist_query(text)
+            started = time.perf_counter()
+            model.search(query)
+            results[f"{case}.search_{name}_ms"] = (time.perf_counter() - started) * 1000
+
+    sources = 4 if quick else 12
+    per_source = 1_000 if quick else 5_000
+    model = PlaylistModel()
+    urls = [playlist_url(f"PLmulti{index:02d}", per_source) for index in range(sources)]
+    for url in urls:
+        model.add_source(url)
+    lock = threading.Lock()
+
+    def on_videos(url: str, videos: list[dict[str, Any]], at_start: bool) -> None:
+        with lock:
+            model.extend(videos, url)
+
+    started = time.perf_counter()
+    PlaylistFetcher().fetch(urls, on_videos, lambda url, return_code, stderr: None)
+    elapsed = time.perf_counter() - started
+    results[f"playlist_population.multi_{sources}x{per_source}.seconds"] = elapsed
+    results[f"playlist_population.multi_{sources}x{per_source}.records_per_second"] = len(model) / elapsed
+    return results
+
+
+def bench_log_throughput(quick: bool) -> Results:
+    """Push unthrottled progress output through the scheduler into the GUI's log buffer."""
+    results: Results = {}
+    lines = 20_000 if quick else 200_000
+    for jobs in (1, 4):
+        log = LogBuffer()
+        stop = threading.Event()
+        drained = 0
+
+        def drain() -> None:
+            # Stands in for the GUI's 100 ms log flush.
+            nonlocal drained
+            while not stop.wait(0.1):
+                drained += len(log.drain()[0])
+
+        drainer = threading.Thread(target=drain, daemon=True)
+        drainer.start()
+        with tempfile.TemporaryDirectory() as output_dir:
+            urls = [video_url(index, lines=lines // jobs, rate=0) for index in range(jobs)]
+            elapsed = run_jobs(urls, jobs, output_dir, on_output=lambda job, line: log.write(line))
+        stop.set()
+        drainer.join()
+        drained += len(log.drain()[0])
+        case = f"log_throughput.{jobs}_jobs"
+        results[f"{case}.seconds"] = elapsed
+        results[f"{case}.progress_lines_per_second"] = lines / elapsed
+        # Progress lines feed the progress bars, not the log, so this should stay near zero.
+        results[f"{case}.log_lines"] = drained
+    return results
+
+
+def bench_batch_conversion(quick: bool) -> Results:
+    """Convert synthetic subtitle files of every supported format and several sizes."""
+    results: Results = {}
+    formats = ("vtt", "srt", "sbv", "ass", "ttml", "json")
+    sizes = (200, 2_000) if quick else (200, 2_000, 20_000)
+    copies = 2 if quick else 4
+    directory = tempfile.mkdtemp(prefix="subtitle-bench-")
+    try:
+        paths = []
+        for subtitle_format in formats:
+            for cues in sizes:
+                for copy in range(copies):
+                    path = os.path.join(directory, f"{subtitle_format}-{cues}-{copy}.{subtitle_format}")
+                    write_subtitles(path, subtitle_format, cues, path)
+                    paths.append(path)
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        for workers in (1, os.cpu_count() or 1):
+            started = time.perf_counter()
+            failed = sum(1 for _, _, error in convert_subtitle_files(paths, workers) if error is not None)
+            elapsed = time.perf_counter() - started
+            case = f"batch_conversion.{workers}_workers"
+            results[f"{case}.seconds"] = elapsed
+            results[f"{case}.files_per_second"] = len(paths) / elapsed
+            results[f"{case}.megabytes_per_second"] = total_bytes / elapsed / 1e6
+            results[f"{case}.failed"] = failed
+        for subtitle_format in formats:
+            path = os.path.join(directory, f"{subtitle_format}-{sizes[-1]}-0.{subtitle_format}")
+            started = time.perf_counter()
+            list(convert_subtitle_files([path], 1))
+            elapsed = time.perf_counter() - started
+            results[f"batch_conversion.{subtitle_format}.megabytes_per_second"] = os.path.getsize(path) / elapsed / 1e6
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_concurrent_scheduling(quick: bool) -> Results:
+    """Run a batch of paced downloads at several concurrency levels and compare with ideal scaling."""
+    results: Results = {}
+    jobs = 16 if quick else 48
+    lines, rate = 20, 100  # 0.2 s of progress per job
+    for concurrency in (1, 4, 8) if quick else (1, 4, 8, 16):
+        metrics = Metrics()
+        with tempfile.TemporaryDirectory() as output_dir:
+            urls = [video_url(index, lines=lines, rate=rate) for index in range(jobs)]
+            elapsed = run_jobs(urls, concurrency, output_dir, metrics=metrics)
+        stats = {row["name"]: row for row in metrics.snapshot()}
+        ideal = jobs / concurrency * lines / rate
+        case = f"concurrent_scheduling.{concurrency}_concurrent"
+        results[f"{case}.seconds"] = elapsed
+        results[f"{case}.jobs_per_second"] = jobs / elapsed
+        results[f"{case}.efficiency"] = ideal / elapsed
+        for name in ("job.spawn_seconds", "job.first_output_seconds"):
+            if name in stats:
+                results[f"{case}.{name.split('.', 1)[1]}_mean"] = stats[name]["mean"]
+    return results
+
+
+SCENARIOS: dict[str, Callable[[bool], Results]] = {
+    "playlist_population": bench_playlist_population,
+    "log_throughput": bench_log_throughput,
+    "batch_conversion": bench_batch_conversion,
+    "concurrent_scheduling": bench_concurrent_scheduling,
+}
+
+
+def git_revision() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=BENCH_DIR,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return ""
+    return result.stdout.strip()
+
+
+def compare(results: Results, baseline: Results) -> None:
+    """Print each metric next to the baseline; rates should go up, times (seconds, ms) down."""
+    print(f"{'metric':<64} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+    for name, value in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = f"{(value - old) / old * 100:+.1f}%" if old else ""
+        print(f"{name:<64} {old:>12.4g} {value:>12.4g} {change:>8}", file=sys.stderr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the downloader pipeline with a local yt-dlp stand-in.")
+    parser.add_argument("scenarios", nargs="*", choices=[[], *SCENARIOS], help="scenarios to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for a fast smoke run")
+    parser.add_argument("-o", "--output", help="write results to this JSON file instead of stdout")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    results: Results = {}
+    for name in args.scenarios or SCENARIOS:
+        print(f"Running {name}…", file=sys.stderr)
+        results.update(SCENARIOS[name](args.quick))
+    report = {
+        "revision": git_revision(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            compare(results, json.load(fh)["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,730 @@
+#!/usr/bin/env python3
+"""Headless batch front end for the downloader pipeline; never imports tkinter."""
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Iterable, Iterator, Optional
+
+from downloader_core import (
+    AUDIO_BITRATES,
+    AUDIO_FORMATS,
+    AUDIO_NATIVE,
+    AUTH_ERROR_RE,
+    BACKEND_BINARY,
+    BACKEND_RESIDENT,
+    BACKENDS,
+    COOKIES_BROWSER_CHOICES,
+    DEFAULT_AUDIO_BITRATE,
+    DEFAULT_AUDIO_FORMAT,
+    DEFAULT_CONCURRENCY,
+    FFMPEG_EXEC,
+    FORMAT_CACHE_PATH,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_JOURNAL_PATH,
+    JOB_RETRYING,
+    JOB_RUNNING,
+    MAX_CONCURRENCY,
+    PROBE_CONCURRENCY,
+    RETRY_LIMIT,
+    TRANSCRIPT_INDEX_PATH,
+    VIDEO_QUALITY_OPTIONS,
+    YT_DLP_EXEC,
+    AudioTranscoder,
+    BrowserCookieCache,
+    DownloadArchive,
+    DownloadJob,
+    DownloadScheduler,
+    FlatPlaylistReader,
+    FormatCache,
+    FormatProber,
+    JobJournal,
+    JournalBatch,
+    Metrics,
+    ResidentWorkerPool,
+    SubtitlePipeline,
+    ThrottleSupervisor,
+    TranscriptIndex,
+    TranscriptIndexer,
+    archive_path,
+    build_download_command,
+    choose_format,
+    convert_subtitle_files,
+    find_subtitle_files,
+    index_transcript_file,
+    is_text_current,
+    pin_format,
+    resident_backend_available,
+    timestamp_url,
+    with_cookie_cache,
+    youtube_video_id,
+)
+
+QUALITY_CHOICES = {key.split()[0].lower(): key for key in VIDEO_QUALITY_OPTIONS}
+
+
+class JsonReporter:
+    """Write one JSON object per line to a stream, safely from several threads."""
+
+    def __init__(self, stream: Any = sys.stdout) -> None:
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def iter_url_lines(path: str) -> Iterator[str]:
+    fh = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def iter_targets(
+    urls: Iterable[str],
+    expand_playlists: bool,
+    executable: str,
+    reporter: JsonReporter,
+    worker_pool: Optional[ResidentWorkerPool] = None,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[tuple[str, str]]:
+    """Yield ``(video_id, url)`` for every URL, expanding playlists; a video listed twice is yielded once."""
+    seen: set[str] = set()
+
+    def first_sighting(video_id: str, url: str) -> bool:
+        if not video_id:
+            return True
+        if video_id in seen:
+            reporter.emit({"url": url, "video_id": video_id, "state": "duplicate"})
+            return False
+        seen.add(video_id)
+        return True
+
+    for url in urls:
+        video_id = youtube_video_id(url)
+        if not expand_playlists or video_id is not None:
+            if first_sighting(video_id or "", url):
+                yield video_id or "", url
+            continue
+        try:
+            reader = FlatPlaylistReader(url, executable, worker_pool, metrics)
+        except OSError as exc:
+            reporter.emit({"url": url, "state": JOB_FAILED, "error": f"Failed to start yt-dlp: {exc}"})
+            continue
+        for video in reader:
+            if first_sighting(video["id"], video["url"]):
+                yield video["id"], video["url"]
+        return_code, stderr_text = reader.wait()
+        if return_code != 0:
+            lines = stderr_text.strip().splitlines()
+            error = lines[-1] if lines else f"yt-dlp exited with code {return_code}"
+            reporter.emit({"url": url, "state": JOB_FAILED, "error": error})
+
+
+def iter_jobs(
+    targets: Iterable[tuple[str, str]],
+    base_cmd: list[str],
+    archive: Optional[DownloadArchive],
+    reporter: JsonReporter,
+) -> Iterator[DownloadJob]:
+    index = 0
+    for video_id, url in targets:
+        if archive is not None and video_id and video_id in archive:
+            reporter.emit({"url": url, "video_id": video_id, "state": "skipped"})
+            continue
+        index += 1
+        yield DownloadJob(index=index, url=url, cmd=[*base_cmd, url], video_id=video_id)
+
+
+def iter_pinned_jobs(
+    jobs: Iterable[DownloadJob],
+    format_cache: FormatCache,
+    mode: str,
+    quality: str,
+) -> Iterator[DownloadJob]:
+    """Pin each job to the exact format chosen from a cached probe, when one exists."""
+    for job in jobs:
+        if job.video_id:
+            try:
+                probe = format_cache.load_many([job.video_id]).get(job.video_id)
+            except (sqlite3.Error, ValueError):
+                probe = None
+            choice = choose_format(probe, mode, quality) if probe is not None else None
+            if choice is not None:
+                job.cmd = pin_format(job.cmd, choice.format_id)
+        yield job
+
+
+def job_record(job: DownloadJob) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "index": job.index,
+        "url": job.url,
+        "video_id": job.video_id,
+        "state": job.state,
+        "return_code": job.return_code,
+    }
+    if job.started_at is not None and job.finished_at is not None:
+        record["seconds"] = round(job.finished_at - job.started_at, 3)
+    if job.error:
+        record["error"] = job.error
+    if job.error_kind:
+        record["error_kind"] = job.error_kind
+    if job.retries:
+        record["retries"] = job.retries
+    return record
+
+
+def open_worker_pool(backend: str) -> Optional[ResidentWorkerPool]:
+    if backend != BACKEND_RESIDENT:
+        return None
+    if resident_backend_available():
+        return ResidentWorkerPool()
+    print("The yt_dlp Python package is not importable; using the yt-dlp binary.", file=sys.stderr)
+    return None
+
+
+def open_metrics(args: argparse.Namespace) -> Optional[Metrics]:
+    return Metrics() if args.metrics else None
+
+
+def export_metrics(metrics: Optional[Metrics], path: Optional[str]) -> None:
+    if metrics is None or not path:
+        return
+    try:
+        metrics.export(path)
+    except OSError as exc:
+        print(f"Could not write metrics to {path}: {exc}", file=sys.stderr)
+
+
+def open_transcript_indexer(
+    args: argparse.Namespace,
+    reporter: JsonReporter,
+    metrics: Optional[Metrics] = None,
+) -> Optional[TranscriptIndexer]:
+    if args.no_index:
+        return None
+
+    def on_indexed(path: str, passages: Optional[str], error: Optional[str]) -> None:
+        if error is not None:
+            reporter.emit({"path": path, "state": "index_failed", "error": error})
+
+    return TranscriptIndexer(TranscriptIndex(args.transcript_index), on_indexed, metrics)
+
+
+def execute_jobs(
+    jobs: Iterable[DownloadJob],
+    mode: str,
+    args: argparse.Namespace,
+    reporter: JsonReporter,
+    worker_pool: Optional[ResidentWorkerPool],
+    cookie_cache: Optional[BrowserCookieCache],
+    batch: Optional[JournalBatch],
+    metrics: Optional[Metrics] = None,
+) -> int:
+    if cookie_cache is not None:
+
+        def on_cookie_fallback(error: str) -> None:
+            print(f"Could not cache browser cookies ({error}); using --cookies-from-browser.", file=sys.stderr)
+
+        jobs = with_cookie_cache(jobs, cookie_cache, on_cookie_fallback)
+
+    pipeline: Optional[SubtitlePipeline] = None
+    indexer: Optional[TranscriptIndexer] = None
+    if mode == "subs" and args.to_text:
+        indexer = open_transcript_indexer(args, reporter, metrics)
+
+        def on_converted(path: str, output_path: Optional[str], error: Optional[str]) -> None:
+            if error is None:
+                reporter.emit({"path": path, "output": output_path, "state": "converted"})
+                if indexer is not None:
+                    indexer.submit([path])
+            else:
+                reporter.emit({"path": path, "state": "conversion_failed", "error": error})
+
+        pipeline = SubtitlePipeline(on_converted, args.convert_workers, metrics)
+
+    transcoder: Optional[AudioTranscoder] = None
+    if mode == "audio" and args.audio_format != AUDIO_NATIVE:
+
+        def on_transcoded(path: str, output_path: Optional[str], error: Optional[str]) -> None:
+            if error is None:
+                reporter.emit({"path": path, "output": output_path, "state": "transcoded"})
+            else:
+                reporter.emit({"path": path, "state": "transcode_failed", "error": error})
+
+        transcoder = AudioTranscoder(
+            on_transcoded,
+            args.audio_format,
+            args.audio_bitrate,
+            keep_original=args.keep_original,
+            workers=args.transcode_workers,
+            executable=args.ffmpeg,
+            metrics=metrics,
+        )
+
+    finished = threading.Event()
+    summary: dict[str, int] = {}
+
+    def on_output(job: DownloadJob, line: str) -> None:
+        if cookie_cache is not None and AUTH_ERROR_RE.search(line):
+            cookie_cache.mark_stale(job.started_at)
+        if args.verbose:
+            sys.stderr.write(f"[{job.index}] {line}")
+
+    def on_state(job: DownloadJob) -> None:
+        if job.state != JOB_RUNNING:
+            reporter.emit(job_record(job))
+        if job.state == JOB_RETRYING and cookie_cache is not None:
+            cookie_cache.prepare(job)
+        if job.state == JOB_DONE and pipeline is not None:
+            pipeline.submit(job.subtitle_paths)
+        if job.state == JOB_DONE and transcoder is not None and job.output_path:
+            transcoder.submit([job.output_path])
+
+    def on_finished(result: dict[str, int]) -> None:
+        summary.update(result)
+        finished.set()
+
+    supervisor = ThrottleSupervisor(args.retries, lambda notice: sys.stderr.write(notice), metrics)
+    scheduler = DownloadScheduler(
+        jobs, args.jobs, on_output, on_state, on_finished, worker_pool, batch, metrics, supervisor
+    )
+    scheduler.start()
+    try:
+        while not finished.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        scheduler.cancel()
+        finished.wait()
+    failed = bool(summary.get(JOB_FAILED))
+    if pipeline is not None:
+        pipeline.close()
+        summary = {**summary, "converted": pipeline.converted, "conversion_failed": pipeline.failed}
+        failed = failed or bool(pipeline.failed)
+    if indexer is not None:
+        indexer.close()
+        summary = {**summary, "indexed": indexer.converted, "index_failed": indexer.failed}
+    if transcoder is not None:
+        transcoder.close()
+        summary = {**summary, "transcoded": transcoder.converted, "transcode_failed": transcoder.failed}
+        failed = failed or bool(transcoder.failed)
+    reporter.emit({"summary": summary})
+    return 0 if not failed and not scheduler.cancelled else 1
+
+
+def run_download(args: argparse.Namespace) -> int:
+    reporter = JsonReporter()
+    urls: Iterable[str] = itertools.chain(args.urls, *(iter_url_lines(path) for path in args.input))
+    if args.cookies and not os.path.isfile(args.cookies):
+        print(f"Cannot find cookies file at {args.cookies}.", file=sys.stderr)
+        return 2
+
+    cookie_cache: Optional[BrowserCookieCache] = None
+    cookies_browser = args.cookies_from_browser
+    if cookies_browser and not args.no_cookie_cache:
+        cookie_cache = BrowserCookieCache(cookies_browser, args.yt_dlp)
+        cookies_browser = None
+
+    archive_file = None if args.no_archive else archive_path(args.output, args.mode)
+    archive = DownloadArchive(archive_file) if archive_file and not args.no_skip else None
+    base_cmd = build_download_command(
+        args.mode,
+        quality=QUALITY_CHOICES[args.quality],
+        cookies_browser=cookies_browser,
+        cookies_file=cookie_cache.path if cookie_cache is not None else args.cookies,
+        output_dir=args.output,
+        archive_file=archive_file,
+        single_video=True,
+        executable=args.yt_dlp,
+    )
+    batch: Optional[JournalBatch] = None
+    if not args.no_journal:
+        try:
+            batch = JobJournal(args.journal).start_batch(
+                args.mode,
+                args.output,
+                cookie_cache.browser if cookie_cache is not None else None,
+            )
+        except sqlite3.Error as exc:
+            print(f"Job journal unavailable, this run cannot be resumed: {exc}", file=sys.stderr)
+
+    worker_pool = open_worker_pool(args.backend)
+    metrics = open_metrics(args)
+    try:
+        targets = iter_targets(urls, args.expand_playlists, args.yt_dlp, reporter, worker_pool, metrics)
+        jobs = iter_jobs(targets, base_cmd, archive, reporter)
+        if args.mode in ("video", "audio") and not args.no_pin_formats:
+            jobs = iter_pinned_jobs(jobs, FormatCache(args.format_cache), args.mode, QUALITY_CHOICES[args.quality])
+        if batch is not None:
+            jobs = batch.track(jobs)
+        return execute_jobs(jobs, args.mode, args, reporter, worker_pool, cookie_cache, batch, metrics)
+    finally:
+        if worker_pool is not None:
+            worker_pool.close()
+        export_metrics(metrics, args.metrics)
+
+
+def run_resume(args: argparse.Namespace) -> int:
+    reporter = JsonReporter()
+    journal = JobJournal(args.journal)
+    try:
+        journal.prune()
+        unfinished = journal.unfinished_batches()
+    except sqlite3.Error as exc:
+        print(f"Job journal unavailable: {exc}", file=sys.stderr)
+        return 2
+
+    exit_code = 0
+    worker_pool = open_worker_pool(args.backend)
+    metrics = open_metrics(args)
+    try:
+        for batch, pending in reversed(unfinished):
+            if not pending:
+                journal.discard(batch)
+                continue
+            cookie_cache = BrowserCookieCache(batch.cookies_browser, args.yt_dlp) if batch.cookies_browser else None
+            reporter.emit(
+                {"resume": batch.batch_id, "mode": batch.mode, "output": batch.output_dir, "pending": pending}
+            )
+            jobs = batch.pending_jobs(args.yt_dlp)
+            result = execute_jobs(jobs, batch.mode, args, reporter, worker_pool, cookie_cache, batch, metrics)
+            exit_code = max(exit_code, result)
+    finally:
+        if worker_pool is not None:
+            worker_pool.close()
+        export_metrics(metrics, args.metrics)
+    return exit_code
+
+
+def run_probe(args: argparse.Namespace) -> int:
+    reporter = JsonReporter()
+    if args.cookies and not os.path.isfile(args.cookies):
+        print(f"Cannot find cookies file at {args.cookies}.", file=sys.stderr)
+        return 2
+    urls: Iterable[str] = itertools.chain(args.urls, *(iter_url_lines(path) for path in args.input))
+    quality = QUALITY_CHOICES[args.quality]
+    targets = list(iter_targets(urls, args.expand_playlists, args.yt_dlp, reporter))
+    urls_by_id = dict(targets)
+    totals = {"videos": 0, "estimated": 0, "unknown": 0, "failed": 0}
+    estimated_bytes = 0.0
+    lock = threading.Lock()
+
+    def on_result(video_id: str, probe: Optional[dict[str, Any]], error: Optional[str]) -> None:
+        nonlocal estimated_bytes
+        record: dict[str, Any] = {"video_id": video_id, "url": urls_by_id.get(video_id, "")}
+        choice = choose_format(probe, args.mode, quality) if probe is not None else None
+        with lock:
+            totals["videos"] += 1
+            if probe is None:
+                totals["failed"] += 1
+                record.update(state=JOB_FAILED, error=error)
+            elif choice is None or choice.size is None:
+                totals["unknown"] += 1
+                record.update(format=choice.format_id if choice else None, size=None)
+            else:
+                totals["estimated"] += 1
+                estimated_bytes += choice.size
+                record.update(format=choice.format_id, size=int(choice.size))
+        reporter.emit(record)
+
+    skipped = sum(1 for video_id, _ in targets if not video_id)
+    if skipped:
+        print(f"Skipping {skipped} URL(s) without a video ID.", file=sys.stderr)
+    cookie_cache = BrowserCookieCache(args.cookies_from_browser, args.yt_dlp) if args.cookies_from_browser else None
+    prober = FormatProber(
+        FormatCache(args.format_cache),
+        args.yt_dlp,
+        args.jobs,
+        cookies_file=args.cookies,
+        cookie_cache=cookie_cache,
+    )
+    try:
+        prober.probe(targets, on_result)
+    except KeyboardInterrupt:
+        prober.stop()
+        return 1
+    reporter.emit({"summary": {**totals, "estimated_bytes": int(estimated_bytes)}})
+    return 1 if totals["failed"] else 0
+
+
+def run_convert(args: argparse.Namespace) -> int:
+    reporter = JsonReporter()
+    paths: list[str] = []
+    current: list[str] = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            found = find_subtitle_files(path)
+            for item in found:
+                (paths if args.force or not is_text_current(item) else current).append(item)
+        else:
+            paths.append(path)
+
+    metrics = open_metrics(args)
+    indexer = open_transcript_indexer(args, reporter, metrics)
+    if indexer is not None:
+        # Files with an up-to-date .txt may still be missing from the index; unchanged ones are skipped there.
+        indexer.submit(current)
+    converted = failed = 0
+    for path, output_path, error in convert_subtitle_files(paths, args.workers, metrics):
+        if error is None:
+            converted += 1
+            reporter.emit({"path": path, "output": output_path, "state": JOB_DONE})
+            if indexer is not None:
+                indexer.submit([path])
+        else:
+            failed += 1
+            reporter.emit({"path": path, "state": JOB_FAILED, "error": error})
+    summary = {JOB_DONE: converted, JOB_FAILED: failed, "skipped": len(current)}
+    if indexer is not None:
+        indexer.close()
+        summary.update(indexed=indexer.converted, index_failed=indexer.failed)
+    reporter.emit({"summary": summary})
+    export_metrics(metrics, args.metrics)
+    return 1 if failed else 0
+
+
+def run_index(args: argparse.Namespace) -> int:
+    reporter = JsonReporter()
+    index = TranscriptIndex(args.transcript_index)
+    totals = {"indexed": 0, "unchanged": 0, "failed": 0, "removed": 0}
+    for path in args.paths:
+        if os.path.isdir(path):
+            try:
+                totals["removed"] += index.prune(path)
+            except sqlite3.Error as exc:
+                print(f"Cannot open transcript index {args.transcript_index}: {exc}", file=sys.stderr)
+                return 2
+            files = find_subtitle_files(path)
+        else:
+            files = [path]
+        for file_path in files:
+            _, passages, error = index_transcript_file(index, file_path)
+            if error is not None:
+                totals["failed"] += 1
+                reporter.emit({"path": file_path, "state": JOB_FAILED, "error": error})
+            elif passages is None:
+                totals["unchanged"] += 1
+            else:
+                totals["indexed"] += 1
+                reporter.emit({"path": file_path, "state": "indexed", "passages": int(passages)})
+    reporter.emit({"summary": totals})
+    return 1 if totals["failed"] else 0
+
+
+def run_search(args: argparse.Namespace) -> int:
+    reporter = JsonReporter()
+    try:
+        matches = TranscriptIndex(args.transcript_index).search(" ".join(args.query), args.limit)
+    except (sqlite3.Error, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    for match in matches:
+        hits = [
+            {"start": start, "url": timestamp_url(match.video_id, start) if match.video_id else None, "text": text}
+            for start, text in match.hits
+        ]
+        reporter.emit({"video_id": match.video_id, "title": match.title, "path": match.path, "hits": hits})
+    return 0 if matches else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Headless batch downloader around yt-dlp. Results are JSON lines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runner = argparse.ArgumentParser(add_help=False)
+    runner.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"parallel yt-dlp processes, up to {MAX_CONCURRENCY} (default: {DEFAULT_CONCURRENCY})",
+    )
+    runner.add_argument(
+        "--retries",
+        type=int,
+        default=RETRY_LIMIT,
+        help="times to retry a job that failed with a rate-limit, sign-in or network error; such errors "
+        f"also pause the batch and lower -j until they stop (default: {RETRY_LIMIT})",
+    )
+    runner.add_argument("--yt-dlp", default=YT_DLP_EXEC, help=f"yt-dlp executable (default: {YT_DLP_EXEC})")
+    runner.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=BACKEND_BINARY,
+        help="run each job with a fresh yt-dlp binary, or on resident workers that keep the "
+        "yt_dlp Python package loaded (default: binary)",
+    )
+    runner.add_argument("--journal", default=JOB_JOURNAL_PATH, help=f"job journal (default: {JOB_JOURNAL_PATH})")
+    runner.add_argument(
+        "--to-text",
+        action="store_true",
+        help="in subs mode, convert each video's subtitles to .txt as soon as its download finishes",
+    )
+    runner.add_argument(
+        "--convert-workers",
+        type=int,
+        help="subtitle conversion processes for --to-text (default: half the CPU cores)",
+    )
+    runner.add_argument(
+        "--transcript-index",
+        default=TRANSCRIPT_INDEX_PATH,
+        help=f"full-text index that --to-text conversions are added to (default: {TRANSCRIPT_INDEX_PATH})",
+    )
+    runner.add_argument("--no-index", action="store_true", help="do not index converted transcripts")
+    runner.add_argument(
+        "--audio-format",
+        choices=(*AUDIO_FORMATS, AUDIO_NATIVE),
+        default=DEFAULT_AUDIO_FORMAT,
+        help="in audio mode, transcode each finished download with ffmpeg, or keep the native stream "
+        f"(default: {DEFAULT_AUDIO_FORMAT})",
+    )
+    runner.add_argument(
+        "--audio-bitrate",
+        choices=AUDIO_BITRATES,
+        default=DEFAULT_AUDIO_BITRATE,
+        help=f"bitrate for lossy audio formats (default: {DEFAULT_AUDIO_BITRATE})",
+    )
+    runner.add_argument(
+        "--transcode-workers",
+        type=int,
+        help="parallel ffmpeg processes for audio transcoding (default: one per CPU core)",
+    )
+    runner.add_argument("--keep-original", action="store_true", help="keep the native audio file after transcoding")
+    runner.add_argument("--ffmpeg", default=FFMPEG_EXEC, help=f"ffmpeg executable (default: {FFMPEG_EXEC})")
+    runner.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="write spawn, fetch, download and conversion timings for this run to FILE (.csv, otherwise JSON)",
+    )
+    runner.add_argument("-v", "--verbose", action="store_true", help="echo yt-dlp output to stderr")
+
+    download = commands.add_parser("download", parents=[runner], help="download videos, audio or subtitles")
+    download.add_argument("urls", nargs="*", help="video, playlist or channel URLs")
+    download.add_argument(
+        "-i",
+        "--input",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="file with one URL per line ('-' for stdin); may be given more than once",
+    )
+    download.add_argument("-m", "--mode", choices=("video", "audio", "subs"), default="video")
+    download.add_argument("-q", "--quality", choices=list(QUALITY_CHOICES), default="best")
+    cookies = download.add_mutually_exclusive_group()
+    cookies.add_argument("--cookies", metavar="FILE", help="cookies.txt to pass to yt-dlp")
+    cookies.add_argument("--cookies-from-browser", choices=sorted(COOKIES_BROWSER_CHOICES.values()))
+    download.add_argument(
+        "--no-cookie-cache",
+        action="store_true",
+        help="let every job read the browser cookies itself instead of sharing one exported copy",
+    )
+    download.add_argument("-o", "--output", default="", help="output folder (default: current directory)")
+    download.add_argument(
+        "--expand-playlists",
+        action="store_true",
+        help="enumerate playlist and channel URLs and download each video as its own job",
+    )
+    download.add_argument("--no-archive", action="store_true", help="do not read or write the download archive")
+    download.add_argument(
+        "--no-skip",
+        action="store_true",
+        help="spawn jobs for videos already in the archive (yt-dlp still skips them)",
+    )
+    download.add_argument(
+        "--no-pin-formats",
+        action="store_true",
+        help="do not pin jobs to exact formats from earlier probes",
+    )
+    download.add_argument(
+        "--format-cache", default=FORMAT_CACHE_PATH, help=f"format probe cache (default: {FORMAT_CACHE_PATH})"
+    )
+    download.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="do not record this run in the job journal (it cannot be resumed)",
+    )
+    download.set_defaults(func=run_download)
+
+    resume = commands.add_parser(
+        "resume",
+        parents=[runner],
+        help="rerun jobs of interrupted or cancelled runs that did not finish",
+    )
+    resume.set_defaults(func=run_resume)
+
+    probe = commands.add_parser(
+        "probe",
+        help="estimate download sizes from the formats each video offers (results are cached)",
+    )
+    probe.add_argument("urls", nargs="*", help="video, playlist or channel URLs")
+    probe.add_argument("-i", "--input", action="append", default=[], metavar="FILE", help="file with one URL per line")
+    probe.add_argument("-m", "--mode", choices=("video", "audio"), default="video")
+    probe.add_argument("-q", "--quality", choices=list(QUALITY_CHOICES), default="best")
+    probe.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=PROBE_CONCURRENCY,
+        help=f"parallel probes (default: {PROBE_CONCURRENCY})",
+    )
+    probe_cookies = probe.add_mutually_exclusive_group()
+    probe_cookies.add_argument("--cookies", metavar="FILE", help="cookies.txt to pass to yt-dlp")
+    probe_cookies.add_argument("--cookies-from-browser", choices=sorted(COOKIES_BROWSER_CHOICES.values()))
+    probe.add_argument("--expand-playlists", action="store_true", help="probe every video of playlist URLs")
+    probe.add_argument("--yt-dlp", default=YT_DLP_EXEC, help=f"yt-dlp executable (default: {YT_DLP_EXEC})")
+    probe.add_argument(
+        "--format-cache", default=FORMAT_CACHE_PATH, help=f"format probe cache (default: {FORMAT_CACHE_PATH})"
+    )
+    probe.set_defaults(func=run_probe)
+
+    convert = commands.add_parser("convert", help="convert subtitle files to plain text")
+    convert.add_argument("paths", nargs="+", help="subtitle files or folders (searched recursively)")
+    convert.add_argument("-w", "--workers", type=int, help="conversion processes (default: one per CPU core)")
+    convert.add_argument("--force", action="store_true", help="reconvert files whose .txt is already up to date")
+    convert.add_argument(
+        "--transcript-index", default=TRANSCRIPT_INDEX_PATH, help=f"full-text index (default: {TRANSCRIPT_INDEX_PATH})"
+    )
+    convert.add_argument("--no-index", action="store_true", help="do not index converted transcripts")
+    convert.add_argument("--metrics", metavar="FILE", help="write conversion timings to FILE (.csv, otherwise JSON)")
+    convert.set_defaults(func=run_convert)
+
+    index = commands.add_parser(
+        "index",
+        help="add subtitle files to the full-text transcript index; unchanged files are skipped",
+    )
+    index.add_argument("paths", nargs="+", help="subtitle files or folders (searched recursively)")
+    index.add_argument(
+        "--transcript-index", default=TRANSCRIPT_INDEX_PATH, help=f"full-text index (default: {TRANSCRIPT_INDEX_PATH})"
+    )
+    index.set_defaults(func=run_index)
+
+    search = commands.add_parser("search", help="search indexed transcripts; prints matching videos with timestamps")
+    search.add_argument("query", nargs="+", help='words to find; "quote phrases", end a word with * to match prefixes')
+    search.add_argument("-n", "--limit", type=int, default=200, help="most matching passages to return (default: 200)")
+    search.add_argument(
+        "--transcript-index", default=TRANSCRIPT_INDEX_PATH, help=f"full-text index (default: {TRANSCRIPT_INDEX_PATH})"
+    )
+    search.set_defaults(func=run_search)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2805 @@
+"""UI-independent download, playlist and subtitle pipeline shared by the GUI and the CLI."""
+import bisect
+import collections
+import csv
+import functools
+import heapq
+import html
+import importlib.util
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from collections.abc import Sized
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+YT_DLP_EXEC = os.environ.get("YT_DLP_EXEC") or os.path.join(BASE_DIR, "yt-dlp_macos")
+DEFAULT_COOKIES = os.path.join(BASE_DIR, "cookies.txt")
+
+
+def _default_data_dir() -> str:
+    """Where caches and the job journal live: next to the scripts, or per user for a bundled app."""
+    if os.environ.get("YT_DOWNLOADER_DATA_DIR"):
+        return os.path.abspath(os.environ["YT_DOWNLOADER_DATA_DIR"])
+    if not getattr(sys, "frozen", False):
+        return BASE_DIR
+    # The app bundle may be read-only and is replaced on update, so keep state out of it.
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/YouTubeDownloader")
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("APPDATA") or os.path.expanduser("~"), "YouTubeDownloader")
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(data_home, "youtube-downloader")
+
+
+DATA_DIR = _default_data_dir()
+COOKIE_CACHE_DIR = os.path.join(DATA_DIR, ".cookie-cache")
+COOKIE_CACHE_MAX_AGE = 12 * 60 * 60
+COOKIE_REFRESH_MARGIN = 60 * 60
+COOKIE_EXPORT_RETRY = 5 * 60
+COOKIE_AUTH_DOMAINS = ("youtube.com", "google.com")
+COOKIE_AUTH_NAMES = frozenset(
+    {
+        "SID",
+        "HSID",
+        "SSID",
+        "APISID",
+        "SAPISID",
+        "LOGIN_INFO",
+        "__Secure-1PSID",
+        "__Secure-3PSID",
+        "__Secure-1PAPISID",
+        "__Secure-3PAPISID",
+    }
+)
+YT_DLP_WORKER_SCRIPT = os.path.join(BASE_DIR, "ytdlp_worker.py")
+WORKER_EXIT_MARKER = "\x00yt-dlp-worker-exit "
+PLAYLIST_CACHE_PATH = os.path.join(DATA_DIR, "playlist_cache.sqlite3")
+PLAYLIST_CACHE_TTL = 6 * 60 * 60
+FETCH_CONCURRENCY = 4
+FETCH_BATCH_SIZE = 200
+FETCH_BATCH_INTERVAL = 0.25
+FORMAT_CACHE_PATH = os.path.join(DATA_DIR, "format_cache.sqlite3")
+FORMAT_CACHE_TTL = 24 * 60 * 60
+PROBE_CONCURRENCY = 6
+JOB_JOURNAL_PATH = os.path.join(DATA_DIR, "job_journal.sqlite3")
+TRANSCRIPT_INDEX_PATH = os.path.join(DATA_DIR, "transcript_index.sqlite3")
+TRANSCRIPT_PASSAGE_WORDS = 40
+TRANSCRIPT_PASSAGE_SECONDS = 30
+ARCHIVE_FILE_TEMPLATE = ".yt-dlp-archive-{mode}.txt"
+VIDEO_QUALITY_OPTIONS = {
+    "Best available": "bestvideo+bestaudio/best",
+    "1080p": "bestvideo[height<=1080]+bestaudio/best[height<=1080]",
+    "720p": "bestvideo[height<=720]+bestaudio/best[height<=720]",
+    "480p": "bestvideo[height<=480]+bestaudio/best[height<=480]",
+}
+FFMPEG_EXEC = os.environ.get("FFMPEG_EXEC") or shutil.which("ffmpeg") or "ffmpeg"
+AUDIO_NATIVE = "native"
+# Output format -> (ffmpeg encoder, extension, whether a bitrate applies).
+AUDIO_FORMATS = {
+    "mp3": ("libmp3lame", ".mp3", True),
+    "m4a": ("aac", ".m4a", True),
+    "opus": ("libopus", ".opus", True),
+    "flac": ("flac", ".flac", False),
+    "wav": ("pcm_s16le", ".wav", False),
+}
+AUDIO_BITRATES = ("96k", "128k", "192k", "256k", "320k")
+DEFAULT_AUDIO_FORMAT = "mp3"
+DEFAULT_AUDIO_BITRATE = "192k"
+QUALITY_HEIGHT_LIMITS = {"Best available": None, "1080p": 1080, "720p": 720, "480p": 480}
+
+SUBTITLE_EXTENSIONS = (".srt", ".vtt", ".ass", ".sbv", ".ttml", ".json")
+JSON_CHUNK_SIZE = 64 * 1024
+DEDUP_WINDOW_WORDS = 64
+DEDUP_MIN_OVERLAP = 2
+DEDUP_FLICKER_SECONDS = 0.1
+
+TAG_RE = re.compile(r"<[^>]+>")
+WHITESPACE_RE = re.compile(r"\s+")
+ASS_OVERRIDE_RE = re.compile(r"\{[^}]*\}")
+VTT_TIMING_RE = re.compile(r"^((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})")
+SBV_TIMING_RE = re.compile(r"^(\d+:\d{2}:\d{2}\.\d{1,3}),(\d+:\d{2}:\d{2}\.\d{1,3})$")
+JSON_EVENTS_RE = re.compile(r'"events"\s*:\s*\[')
+WORD_NORMALIZE_RE = re.compile(r"[^\w']+")
+TITLE_TOKEN_RE = re.compile(r"\w+")
+DURATION_FILTER_RE = re.compile(r"^([<>])(\d+(?:\.\d+)?)([smh]?)$")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "": 60}
+COUNT_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+VIDEO_ID_IN_NAME_RE = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
+SEARCH_TOKEN_RE = re.compile(r'"[^"]*"?|[^\s"]+')
+URL_SEPARATOR_RE = re.compile(r"[\s,]+")
+SUBTITLE_PATH_RE = re.compile(r"^\[info\] Writing video subtitles to: (.+)$")
+OUTPUT_PATH_RES = (
+    re.compile(r"^\[(?:download|ExtractAudio)\] Destination: (.+)$"),
+    re.compile(r'^\[Merger\] Merging formats into "(.+)"$'),
+    SUBTITLE_PATH_RE,
+    re.compile(r"^\[download\] (.+) has already been downloaded$"),
+)
+AUTH_ERROR_RE = re.compile(
+    r"Sign in to confirm|cookies are no longer valid|Use --cookies|HTTP Error 40[13]",
+    re.IGNORECASE,
+)
+ERROR_RATE_LIMIT = "rate limit"
+ERROR_AUTH = "sign-in"
+ERROR_NETWORK = "network"
+ERROR_UNAVAILABLE = "unavailable"
+# Checked in order: a 429 page often also suggests cookies, and "unavailable" wins over how it was fetched.
+ERROR_PATTERNS = (
+    (ERROR_RATE_LIMIT, re.compile(r"HTTP Error 429|Too Many Requests|rate[- ]limit", re.IGNORECASE)),
+    (ERROR_AUTH, AUTH_ERROR_RE),
+    (
+        ERROR_UNAVAILABLE,
+        re.compile(
+            r"Video unavailable|Private video|video (?:has been|is) (?:removed|private)|members[- ]only|"
+            r"not available in your country|account associated with this video|HTTP Error 404|"
+            r"Premieres in|live event will begin|Unsupported URL",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        ERROR_NETWORK,
+        re.compile(
+            r"timed? ?out|Connection (?:reset|refused|aborted)|urlopen error|Name or service not known|"
+            r"name resolution|Network is unreachable|HTTP Error 5\d\d|IncompleteRead|Remote end closed|"
+            r"SSL|did not get any data blocks",
+            re.IGNORECASE,
+        ),
+    ),
+)
+
+COOKIES_BROWSER_CHOICES = {
+    "Chrome": "chrome",
+    "Brave": "brave",
+    "Edge": "edge",
+    "Firefox": "firefox",
+    "Safari": "safari",
+}
+
+DEFAULT_CONCURRENCY = 3
+MAX_CONCURRENCY = 16
+RETRY_LIMIT = 3
+RETRY_BASE_DELAY = 15.0
+RETRY_MAX_DELAY = 5 * 60.0
+THROTTLE_BASE_DELAY = 60.0
+THROTTLE_MAX_DELAY = 15 * 60.0
+RAMP_UP_SECONDS = 2 * 60.0
+
+LOG_BUFFER_CAPACITY = 10000
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+TRACKING_QUERY_PARAMS = {"si", "feature", "pp", "app"}
+
+PROGRESS_PREFIX = "[progress]"
+PROGRESS_FIELDS = (
+    "status",
+    "downloaded_bytes",
+    "total_bytes",
+    "total_bytes_estimate",
+    "speed",
+    "eta",
+    "fragment_index",
+    "fragment_count",
+)
+PROGRESS_TEMPLATE = "download:" + " ".join([PROGRESS_PREFIX, *(f"%(progress.{name})s" for name in PROGRESS_FIELDS)])
+STALL_SECONDS = 60
+
+BACKEND_BINARY = "binary"
+BACKEND_RESIDENT = "resident"
+BACKENDS = (BACKEND_BINARY, BACKEND_RESIDENT)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_RETRYING = "retrying"
+JOB_STATES = (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_RETRYING)
+
+
+def parse_flat_playlist_line(line: str) -> Optional[dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if data.get("_type") != "url":
+        return None
+    raw_url = data.get("url") or ""
+    if raw_url.startswith("http"):
+        video_url = raw_url
+    else:
+        video_url = f"https://www.youtube.com/watch?v={raw_url}"
+    title = data.get("title") or video_url
+    upload_date = data.get("upload_date") or ""
+    timestamp = data.get("timestamp") or data.get("release_timestamp")
+    if not upload_date and isinstance(timestamp, (int, float)):
+        upload_date = time.strftime("%Y%m%d", time.gmtime(timestamp))
+    return {
+        "id": data.get("id") or raw_url or video_url,
+        "title": title,
+        "url": video_url,
+        "duration": data.get("duration"),
+        "upload_date": upload_date,
+        "view_count": data.get("view_count"),
+    }
+
+
+def parse_output_path(line: str) -> Optional[str]:
+    """File path yt-dlp reports writing to on this output line, if any."""
+    line = line.rstrip("\r\n")
+    for pattern in OUTPUT_PATH_RES:
+        match = pattern.match(line)
+        if match:
+            return match.group(1)
+    return None
+
+
+def classify_error(line: str) -> Optional[str]:
+    """Kind of yt-dlp failure an ``ERROR:`` line reports (ERROR_RATE_LIMIT, ...), or None if unrecognised."""
+    if not line.startswith("ERROR:"):
+        return None
+    for kind, pattern in ERROR_PATTERNS:
+        if pattern.search(line):
+            return kind
+    return None
+
+
+def youtube_video_id(url: str) -> Optional[str]:
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.endswith("youtu.be"):
+        return parts.path.strip("/").split("/")[0] or None
+    if not host.endswith("youtube.com"):
+        return None
+    if parts.path == "/watch":
+        return urllib.parse.parse_qs(parts.query).get("v", [None])[0]
+    segments = parts.path.strip("/").split("/")
+    if len(segments) >= 2 and segments[0] in {"shorts", "live", "embed"}:
+        return segments[1]
+    return None
+
+
+def flat_playlist_command(url: str, executable: str = YT_DLP_EXEC) -> list[str]:
+    return [executable, "--flat-playlist", "--lazy-playlist", "--dump-json", url]
+
+
+def cookie_args(cookies_browser: Optional[str] = None, cookies_file: Optional[str] = None) -> list[str]:
+    if cookies_browser:
+        return ["--cookies-from-browser", cookies_browser]
+    if cookies_file:
+        return ["--cookies", cookies_file]
+    return []
+
+
+def build_download_command(
+    mode: str,
+    quality: Optional[str] = None,
+    cookies_browser: Optional[str] = None,
+    cookies_file: Optional[str] = None,
+    output_dir: str = "",
+    archive_file: Optional[str] = None,
+    single_video: bool = False,
+    executable: str = YT_DLP_EXEC,
+) -> list[str]:
+    cmd = [executable, "--newline", "--progress-template", PROGRESS_TEMPLATE]
+    cmd.extend(cookie_args(cookies_browser, cookies_file))
+    if output_dir:
+        cmd.extend(["-P", output_dir])
+
+    if mode == "video":
+        format_selector = VIDEO_QUALITY_OPTIONS.get(quality or "")
+        if format_selector:
+            cmd.extend(["-f", format_selector])
+    elif mode == "audio":
+        # Native stream only; AudioTranscoder converts finished files off the download path.
+        cmd.extend(["-f", "bestaudio/best"])
+    elif mode == "subs":
+        cmd.extend(["--skip-download", "--write-subs", "--write-auto-subs", "--sub-format", "best"])
+    if single_video:
+        cmd.append("--no-playlist")
+    if archive_file:
+        cmd.extend(["--download-archive", archive_file])
+        if mode == "subs":
+            cmd.append("--force-write-archive")
+    return cmd
+
+
+def pin_format(cmd: list[str], format_id: str) -> list[str]:
+    """Ask yt-dlp for an exact probed format, keeping the original selector as a fallback."""
+    if "-f" in cmd:
+        index = cmd.index("-f") + 1
+        return [*cmd[:index], f"{format_id}/{cmd[index]}", *cmd[index + 1:]]
+    return [cmd[0], "-f", format_id, *cmd[1:]]
+
+
+def normalize_playlist_url(url: str) -> str:
+    parts = urllib.parse.urlsplit(url.strip())
+    netloc = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if netloc.startswith(prefix):
+            netloc = netloc[len(prefix):]
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_QUERY_PARAMS
+    )
+    return urllib.parse.urlunsplit(("https", netloc, path, urllib.parse.urlencode(query), ""))
+
+
+def lists_newest_first(url: str) -> bool:
+    """Whether a listing puts new uploads first: channel pages and their uploads playlist, not ordinary playlists."""
+    parts = urllib.parse.urlsplit(url.strip())
+    if parts.path.startswith(("/@", "/channel/", "/c/", "/user/")):
+        return True
+    playlist_ids = urllib.parse.parse_qs(parts.query).get("list", [])
+    return any(playlist_id.startswith("UU") for playlist_id in playlist_ids)
+
+
+def split_urls(text: str) -> list[str]:
+    """URLs pasted as one blob (whitespace, newline or comma separated), in order and without repeats."""
+    urls: list[str] = []
+    seen: set[str] = set()
+    for url in URL_SEPARATOR_RE.split(text.strip()):
+        key = normalize_playlist_url(url) if url else ""
+        if key and key not in seen:
+            seen.add(key)
+            urls.append(url)
+    return urls
+
+
+def source_label(url: str) -> str:
+    """Short name for a playlist or channel URL: the playlist ID, the @handle or channel ID, or the path."""
+    parts = urllib.parse.urlsplit(url.strip())
+    playlist_id = urllib.parse.parse_qs(parts.query).get("list")
+    if playlist_id:
+        return playlist_id[0]
+    segments = [segment for segment in parts.path.split("/") if segment]
+    for position, segment in enumerate(segments):
+        if segment.startswith("@"):
+            return segment
+        if segment in ("channel", "c", "user") and position + 1 < len(segments):
+            return segments[position + 1]
+    return "/".join(segments) or parts.netloc or url
+
+
+def format_bytes(size: Optional[float]) -> str:
+    if size is None:
+        return "?"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def archive_path(output_dir: str, mode: str) -> str:
+    return os.path.join(output_dir or os.getcwd(), ARCHIVE_FILE_TEMPLATE.format(mode=mode))
+
+
+def connect_database(path: str, **kwargs: Any) -> sqlite3.Connection:
+    """Open a SQLite file, creating its directory first (the per-user data directory may not exist yet)."""
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    except OSError:
+        pass  # sqlite3 reports the unusable path itself
+    return sqlite3.connect(path, **kwargs)
+
+
+def terminate_process(process: subprocess.Popen) -> None:
+    try:
+        process.terminate()
+    except OSError:
+        pass
+
+
+def resident_backend_available() -> bool:
+    """Resident workers need the yt_dlp package importable by this interpreter (not a frozen app)."""
+    return (
+        not getattr(sys, "frozen", False)
+        and os.path.isfile(YT_DLP_WORKER_SCRIPT)
+        and importlib.util.find_spec("yt_dlp") is not None
+    )
+
+
+def find_subtitle_files(directory: str) -> list[str]:
+    paths: list[str] = []
+    for folder, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.lower().endswith(SUBTITLE_EXTENSIONS):
+                paths.append(os.path.join(folder, filename))
+    paths.sort()
+    return paths
+
+
+def is_text_current(path: str) -> bool:
+    output_path = os.path.splitext(path)[0] + ".txt"
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+
+class Cue(NamedTuple):
+    start: Optional[float]
+    end: Optional[float]
+    text: str
+
+
+def parse_timestamp(value: Optional[str], tick_rate: float = 1.0) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip().replace(",", ".")
+    try:
+        if value.endswith("ms"):
+            return float(value[:-2]) / 1000
+        if value.endswith("s"):
+            return float(value[:-1])
+        if value.endswith("t"):
+            return float(value[:-1]) / tick_rate
+        parts = value.split(":")
+        frames = float(parts.pop()) / 30 if len(parts) == 4 else 0.0
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+        return seconds + frames
+    except ValueError:
+        return None
+
+
+def clean_cue_text(text: str) -> str:
+    text = html.unescape(TAG_RE.sub("", text))
+    lines = (WHITESPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _iter_block_cues(lines: Iterable[str], timing_re: re.Pattern[str]) -> Iterator[Cue]:
+    start: Optional[float] = None
+    end: Optional[float] = None
+    text: list[str] = []
+    in_cue = False
+    skip_block = False
+    for raw in lines:
+        # Only an empty line ends a block: rolling auto-captions open many cues with a " " line.
+        if not raw.rstrip("\r\n"):
+            if in_cue and text:
+                yield Cue(start, end, clean_cue_text("\n".join(text)))
+            in_cue = skip_block = False
+            text = []
+            continue
+        line = raw.strip().lstrip("\ufeff")
+        if not line or skip_block:
+            continue
+        match = timing_re.match(line)
+        if in_cue and match:
+            # A separator holding only whitespace: the timing line starts the next cue, and the
+            # line before it is that cue's SRT index, not text.
+            if text and text[-1].isdigit():
+                text.pop()
+            if text:
+                yield Cue(start, end, clean_cue_text("\n".join(text)))
+            text = []
+        elif in_cue:
+            text.append(line)
+            continue
+        if match:
+            start, end = parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+            in_cue = True
+        elif line.upper().startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+            skip_block = True
+    if in_cue and text:
+        yield Cue(start, end, clean_cue_text("\n".join(text)))
+
+
+def _iter_ass_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    in_events = False
+    fields: list[str] = []
+    for raw in lines:
+        line = raw.strip().lstrip("\ufeff")
+        if line.startswith("["):
+            in_events = line.lower() == "[events]"
+            continue
+        if not in_events:
+            continue
+        key, _, rest = line.partition(":")
+        key = key.strip().lower()
+        if key == "format":
+            fields = [name.strip().lower() for name in rest.split(",")]
+        elif key == "dialogue" and fields:
+            record = dict(zip(fields, rest.strip().split(",", len(fields) - 1)))
+            text = ASS_OVERRIDE_RE.sub("", record.get("text", ""))
+            text = text.replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+            yield Cue(parse_timestamp(record.get("start")), parse_timestamp(record.get("end")), clean_cue_text(text))
+
+
+def _ttml_local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _ttml_text(elem: ET.Element) -> str:
+    parts = [WHITESPACE_RE.sub(" ", elem.text or "")]
+    for child in elem:
+        parts.append("\n" if _ttml_local_name(child.tag) == "br" else _ttml_text(child))
+        parts.append(WHITESPACE_RE.sub(" ", child.tail or ""))
+    return "".join(parts)
+
+
+def _iter_ttml_cues(fh: IO[bytes]) -> Iterator[Cue]:
+    tick_rate = 1.0
+    stack: list[ET.Element] = []
+    for event, elem in ET.iterparse(fh, events=("start", "end")):
+        if event == "start":
+            if not stack:
+                for name, value in elem.attrib.items():
+                    if _ttml_local_name(name) == "tickRate":
+                        tick_rate = float(value) or 1.0
+            stack.append(elem)
+            continue
+        stack.pop()
+        if _ttml_local_name(elem.tag) != "p":
+            continue
+        begin = parse_timestamp(elem.get("begin"), tick_rate)
+        end = parse_timestamp(elem.get("end"), tick_rate)
+        duration = parse_timestamp(elem.get("dur"), tick_rate)
+        if end is None and begin is not None and duration is not None:
+            end = begin + duration
+        yield Cue(begin, end, clean_cue_text(_ttml_text(elem)))
+        if stack:
+            stack[-1].remove(elem)
+
+
+def _iter_json_array(fh: IO[str], array_re: re.Pattern[str]) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        match = array_re.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        chunk = fh.read(JSON_CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("No caption events found in JSON subtitle file")
+        buffer = buffer[-64:] + chunk
+
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass
+            else:
+                yield item
+                pos = end
+                if pos > JSON_CHUNK_SIZE:
+                    buffer = buffer[pos:]
+                    pos = 0
+                continue
+        if eof:
+            raise ValueError("Truncated or invalid JSON subtitle file")
+        chunk = fh.read(JSON_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def _iter_json3_cues(fh: IO[str]) -> Iterator[Cue]:
+    for event in _iter_json_array(fh, JSON_EVENTS_RE):
+        segs = event.get("segs") if isinstance(event, dict) else None
+        if not segs:
+            continue
+        text = "".join(seg.get("utf8", "") for seg in segs)
+        start_ms = event.get("tStartMs")
+        duration_ms = event.get("dDurationMs")
+        start = start_ms / 1000 if start_ms is not None else None
+        end = (start_ms + duration_ms) / 1000 if start_ms is not None and duration_ms is not None else None
+        yield Cue(start, end, clean_cue_text(text))
+
+
+def _iter_plain_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    block: list[str] = []
+    for raw in lines:
+        line = raw.strip()
+        if line:
+            block.append(line)
+        elif block:
+            yield Cue(None, None, clean_cue_text("\n".join(block)))
+            block = []
+    if block:
+        yield Cue(None, None, clean_cue_text("\n".join(block)))
+
+
+def iter_subtitle_cues(path: str) -> Iterator[Cue]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".ttml":
+        with open(path, "rb") as fh:
+            cues: Iterable[Cue] = _iter_ttml_cues(fh)
+            yield from (cue for cue in cues if cue.text)
+        return
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        if ext in {".srt", ".vtt"}:
+            cues = _iter_block_cues(fh, VTT_TIMING_RE)
+        elif ext == ".sbv":
+            cues = _iter_block_cues(fh, SBV_TIMING_RE)
+        elif ext == ".ass":
+            cues = _iter_ass_cues(fh)
+        elif ext == ".json":
+            cues = _iter_json3_cues(fh)
+        else:
+            cues = _iter_plain_cues(fh)
+        yield from (cue for cue in cues if cue.text)
+
+
+def _overlap_length(tail: collections.deque[str], words: list[str]) -> int:
+    tail_words = list(tail)
+    for size in range(min(len(tail_words), len(words)), 0, -1):
+        if tail_words[-size] == words[0] and tail_words[-size:] == words[:size]:
+            return size
+    return 0
+
+
+def dedupe_cues(cues: Iterable[Cue], window: int = DEDUP_WINDOW_WORDS) -> Iterator[Cue]:
+    """Strip text a cue repeats from the last ``window`` words already emitted, keeping spoken repeats."""
+    tail: collections.deque[str] = collections.deque(maxlen=window)
+    for cue in cues:
+        tokens = [(line_no, word) for line_no, line in enumerate(cue.text.split("\n")) for word in line.split()]
+        words = [WORD_NORMALIZE_RE.sub("", word.lower()) for _, word in tokens]
+        if not words:
+            continue
+        overlap = _overlap_length(tail, words)
+        line_breaks = {index for index in range(1, len(tokens)) if tokens[index][0] != tokens[index - 1][0]}
+        if overlap == len(words):
+            flicker = cue.start is not None and cue.end is not None and cue.end - cue.start < DEDUP_FLICKER_SECONDS
+            if flicker:
+                continue
+            overlap = 0
+        elif overlap < DEDUP_MIN_OVERLAP and overlap not in line_breaks:
+            overlap = 0
+        tail.extend(words[overlap:])
+
+        lines: list[list[str]] = []
+        previous_line = -1
+        for line_no, word in tokens[overlap:]:
+            if line_no != previous_line:
+                lines.append([])
+                previous_line = line_no
+            lines[-1].append(word)
+        yield Cue(cue.start, cue.end, "\n".join(" ".join(line) for line in lines))
+
+
+def subtitle_to_text(path: str) -> str:
+    output_path = os.path.splitext(path)[0] + ".txt"
+    temp_path = output_path + ".part"
+    wrote_any = False
+    try:
+        with open(temp_path, "w", encoding="utf-8") as out:
+            for cue in dedupe_cues(iter_subtitle_cues(path)):
+                if wrote_any:
+                    out.write("\n")
+                out.write(cue.text + "\n")
+                wrote_any = True
+            if not wrote_any:
+                out.write("\n")
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return output_path
+
+
+def convert_subtitle_file(path: str) -> tuple[str, Optional[str], Optional[str]]:
+    try:
+        return path, subtitle_to_text(path), None
+    except Exception as exc:  # noqa: BLE001
+        return path, None, str(exc)
+
+
+@dataclass
+class MetricStat:
+    count: int = 0
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    last: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.last = value
+
+
+class Metrics:
+    """Thread-safe in-memory aggregates of named timings and rates for one session.
+
+    Only count, total, min, max and the last value are kept per metric, so recording is cheap enough
+    for per-line and per-job call sites.
+    """
+
+    FIELDS = ("name", "count", "mean", "min", "max", "last", "total")
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self._stats: dict[str, MetricStat] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, value: float) -> None:
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = MetricStat()
+            stat.add(value)
+
+    def record_rate(self, name: str, amount: float, seconds: float) -> None:
+        if seconds > 0:
+            self.record(name, amount / seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+            self.started_at = time.time()
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            stats = sorted(self._stats.items())
+            return [
+                {
+                    "name": name,
+                    "count": stat.count,
+                    "mean": stat.total / stat.count,
+                    "min": stat.minimum,
+                    "max": stat.maximum,
+                    "last": stat.last,
+                    "total": stat.total,
+                }
+                for name, stat in stats
+            ]
+
+    def export(self, path: str) -> None:
+        """Write the session's metrics to ``path``: CSV for a ``.csv`` name, JSON otherwise."""
+        rows = self.snapshot()
+        with open(path, "w", encoding="utf-8", newline="") as fh:
+            if path.lower().endswith(".csv"):
+                writer = csv.DictWriter(fh, fieldnames=self.FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                payload = {"started_at": self.started_at, "exported_at": time.time(), "metrics": rows}
+                json.dump(payload, fh, indent=2)
+                fh.write("\n")
+
+
+def timed_call(convert: Callable[[str], Any], path: str) -> tuple[Any, float]:
+    """Run ``convert(path)`` and return its result with the seconds it took, measured where it ran."""
+    started = time.perf_counter()
+    result = convert(path)
+    return result, time.perf_counter() - started
+
+
+def file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def convert_subtitle_files(
+    paths: list[str],
+    workers: Optional[int] = None,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[tuple[str, Optional[str], Optional[str]]]:
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    convert = functools.partial(timed_call, convert_subtitle_file)
+    if workers <= 1:
+        results: Iterable[tuple[Any, float]] = map(convert, paths)
+        pool: Optional[ProcessPoolExecutor] = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(convert, paths, chunksize=max(1, len(paths) // (workers * 8)))
+    try:
+        for result, seconds in results:
+            path, _, error = result
+            if metrics is not None and error is None:
+                record_conversion(metrics, "convert", path, seconds)
+            yield result
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def record_conversion(metrics: Metrics, name: str, path: str, seconds: float, size: Optional[int] = None) -> None:
+    metrics.record(f"{name}.seconds", seconds)
+    size = file_size(path) if size is None else size
+    if size is not None:
+        metrics.record_rate(f"{name}.bytes_per_second", size, seconds)
+
+
+def transcode_command(
+    source: str,
+    target: str,
+    audio_format: str,
+    bitrate: str = DEFAULT_AUDIO_BITRATE,
+    executable: str = FFMPEG_EXEC,
+) -> list[str]:
+    codec, _, uses_bitrate = AUDIO_FORMATS[audio_format]
+    cmd = [executable, "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", source, "-vn", "-c:a", codec]
+    if uses_bitrate:
+        cmd.extend(["-b:a", bitrate])
+    cmd.append(target)
+    return cmd
+
+
+def transcode_audio(
+    path: str,
+    audio_format: str,
+    bitrate: str = DEFAULT_AUDIO_BITRATE,
+    keep_original: bool = False,
+    executable: str = FFMPEG_EXEC,
+) -> tuple[str, Optional[str], Optional[str]]:
+    """Transcode a downloaded audio file with ffmpeg next to the original, as yt-dlp's ``-x`` would."""
+    root = os.path.splitext(path)[0]
+    extension = AUDIO_FORMATS[audio_format][1]
+    target = root + extension
+    part_path = f"{root}.part{extension}"
+    try:
+        result = subprocess.run(
+            transcode_command(path, part_path, audio_format, bitrate, executable),
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            raise OSError(lines[-1] if lines else f"ffmpeg exited with code {result.returncode}")
+        os.replace(part_path, target)
+        if target != path and not keep_original:
+            os.remove(path)
+    except OSError as exc:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return path, None, str(exc)
+    return path, target, None
+
+
+class FilePipeline:
+    """Run a per-file conversion on a background executor while downloads keep running.
+
+    Paths are submitted as their jobs finish, so every file is complete; results are reported from
+    the executor's callback thread.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        convert: Callable[[str], tuple[str, Optional[str], Optional[str]]],
+        on_result: Callable[[str, Optional[str], Optional[str]], None],
+        metrics: Optional[Metrics] = None,
+        metric: str = "",
+    ) -> None:
+        self.on_result = on_result
+        self.metrics = metrics
+        self.metric = metric
+        self.submitted = 0
+        self.converted = 0
+        self.failed = 0
+        self._convert = convert
+        self._lock = threading.Lock()
+        self._pool = executor
+
+    def submit(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            with self._lock:
+                self.submitted += 1
+            # Sized before converting: a transcode may remove its source.
+            size = file_size(path) if self.metrics is not None else None
+            future = self._pool.submit(timed_call, self._convert, path)
+            future.add_done_callback(lambda done, path=path, size=size: self._report(path, done, size))
+
+    def _report(self, path: str, future: Future, size: Optional[int] = None) -> None:
+        try:
+            (_, output_path, error), seconds = future.result()
+        except Exception as exc:  # noqa: BLE001 - a crashed worker process breaks the whole pool
+            output_path, error, seconds = None, str(exc), 0.0
+        if self.metrics is not None and error is None:
+            record_conversion(self.metrics, self.metric, path, seconds, size)
+        with self._lock:
+            if error is None:
+                self.converted += 1
+            else:
+                self.failed += 1
+        self.on_result(path, output_path, error)
+
+    def close(self) -> None:
+        """Wait for every submitted conversion to finish."""
+        self._pool.shutdown(wait=True)
+
+
+class SubtitlePipeline(FilePipeline):
+    """Convert downloaded subtitle files to text on a process pool."""
+
+    def __init__(
+        self,
+        on_result: Callable[[str, Optional[str], Optional[str]], None],
+        workers: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        pool = ProcessPoolExecutor(max_workers=workers or max(1, (os.cpu_count() or 2) // 2))
+        super().__init__(pool, convert_subtitle_file, on_result, metrics, "convert")
+
+
+class AudioTranscoder(FilePipeline):
+    """Transcode downloaded audio with ffmpeg on a core-count-sized pool, so downloads never wait on the CPU."""
+
+    def __init__(
+        self,
+        on_result: Callable[[str, Optional[str], Optional[str]], None],
+        audio_format: str = DEFAULT_AUDIO_FORMAT,
+        bitrate: str = DEFAULT_AUDIO_BITRATE,
+        keep_original: bool = False,
+        workers: Optional[int] = None,
+        executable: str = FFMPEG_EXEC,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        # Each worker thread only waits on its own ffmpeg process.
+        pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        convert = functools.partial(
+            transcode_audio,
+            audio_format=audio_format,
+            bitrate=bitrate,
+            keep_original=keep_original,
+            executable=executable,
+        )
+        super().__init__(pool, convert, on_result, metrics, "transcode")
+
+
+def transcript_passages(cues: Iterable[Cue]) -> Iterator[tuple[Optional[float], str]]:
+    """Merge cues into passages of about ``TRANSCRIPT_PASSAGE_WORDS`` words, each with its start time.
+
+    Auto-caption cues hold a few words each; indexing passages keeps phrases that span cues searchable
+    and the index a fraction of the size.
+    """
+    start: Optional[float] = None
+    words: list[str] = []
+    for cue in cues:
+        if words and start is not None and cue.start is not None and cue.start - start >= TRANSCRIPT_PASSAGE_SECONDS:
+            yield start, " ".join(words)
+            words = []
+        if not words:
+            start = cue.start
+        words.extend(cue.text.split())
+        if len(words) >= TRANSCRIPT_PASSAGE_WORDS:
+            yield start, " ".join(words)
+            words = []
+    if words:
+        yield start, " ".join(words)
+
+
+def transcript_name(path: str) -> tuple[str, str]:
+    """Video ID and title from a yt-dlp file name such as ``Title [dQw4w9WgXcQ].en.vtt``."""
+    name = os.path.basename(path)
+    matches = list(VIDEO_ID_IN_NAME_RE.finditer(name))
+    if not matches:
+        return "", name.split(".", 1)[0]
+    return matches[-1].group(1), name[:matches[-1].start()].strip()
+
+
+def search_query(text: str) -> str:
+    """FTS5 query for search box text: every word must appear, ``word*`` matches a prefix, quotes keep phrases."""
+    terms = []
+    for token in SEARCH_TOKEN_RE.findall(text):
+        prefix = not token.startswith('"') and token.endswith("*")
+        phrase = token.strip('"*')
+        if phrase.strip():
+            terms.append('"' + phrase + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def timestamp_url(video_id: str, seconds: Optional[float]) -> str:
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    return f"{url}&t={int(seconds)}s" if seconds else url
+
+
+class TranscriptMatch(NamedTuple):
+    video_id: str
+    title: str
+    path: str
+    hits: list[tuple[Optional[float], str]]
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index of subtitle transcripts, stored as timed passages.
+
+    Files are keyed by path and re-read only when their size or modification time changed, so indexing
+    a folder again only touches new or rewritten subtitles.
+    """
+
+    def __init__(self, path: str = TRANSCRIPT_INDEX_PATH) -> None:
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect_database(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            "id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, video_id TEXT NOT NULL, title TEXT NOT NULL, "
+            "mtime REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS passages ("
+            "id INTEGER PRIMARY KEY, transcript_id INTEGER NOT NULL, start REAL, text TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS passages_transcript ON passages (transcript_id)")
+        # External-content FTS table: the text is stored once, in passages, and kept in sync by triggers.
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5("
+            "text, content='passages', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS passages_insert AFTER INSERT ON passages BEGIN "
+            "INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text); END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS passages_delete AFTER DELETE ON passages BEGIN "
+            "INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+        )
+        return conn
+
+    def index_file(self, path: str) -> Optional[int]:
+        """Index one subtitle file; returns its passage count, or None if it is unchanged since last time."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT id, mtime, size FROM transcripts WHERE path = ?", (path,)).fetchone()
+            if row is not None and row[1] == stat.st_mtime and row[2] == stat.st_size:
+                return None
+            passages = list(transcript_passages(dedupe_cues(iter_subtitle_cues(path))))
+            video_id, title = transcript_name(path)
+            with conn:
+                if row is not None:
+                    transcript_id = row[0]
+                    conn.execute("DELETE FROM passages WHERE transcript_id = ?", (transcript_id,))
+                    conn.execute(
+                        "UPDATE transcripts SET video_id = ?, title = ?, mtime = ?, size = ? WHERE id = ?",
+                        (video_id, title, stat.st_mtime, stat.st_size, transcript_id),
+                    )
+                else:
+                    transcript_id = conn.execute(
+                        "INSERT INTO transcripts (path, video_id, title, mtime, size) VALUES (?, ?, ?, ?, ?)",
+                        (path, video_id, title, stat.st_mtime, stat.st_size),
+                    ).lastrowid
+                conn.executemany(
+                    "INSERT INTO passages (transcript_id, start, text) VALUES (?, ?, ?)",
+                    ((transcript_id, start, text) for start, text in passages),
+                )
+        return len(passages)
+
+    def prune(self, directory: Optional[str] = None) -> int:
+        """Forget indexed files (under ``directory``, if given) that no longer exist; returns how many."""
+        prefix = os.path.join(os.path.abspath(directory), "") if directory else ""
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute("SELECT id, path FROM transcripts").fetchall()
+            gone = [(row_id,) for row_id, path in rows if path.startswith(prefix) and not os.path.exists(path)]
+            conn.executemany("DELETE FROM passages WHERE transcript_id = ?", gone)
+            conn.executemany("DELETE FROM transcripts WHERE id = ?", gone)
+        return len(gone)
+
+    def search(self, text: str, limit: int = 200) -> list[TranscriptMatch]:
+        """The first ``limit`` passages matching ``text``, grouped by video, most recently indexed first.
+
+        Ordering by bm25 rank would score every match before returning; newest-first lets SQLite stop at
+        ``limit``, which keeps common words fast over a large index.
+        """
+        query = search_query(text)
+        if not query:
+            return []
+        with closing(self._connect()) as conn:
+            try:
+                rows = conn.execute(
+                    "SELECT t.video_id, t.title, t.path, p.start, snippet(passages_fts, 0, '[', ']', '…', 16) "
+                    "FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid "
+                    "JOIN transcripts t ON t.id = p.transcript_id "
+                    "WHERE passages_fts MATCH ? ORDER BY passages_fts.rowid DESC LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            except sqlite3.OperationalError as exc:
+                raise ValueError(f"Invalid search: {exc}") from exc
+        matches: dict[str, TranscriptMatch] = {}
+        for video_id, title, path, start, snippet in rows:
+            match = matches.setdefault(path, TranscriptMatch(video_id, title, path, []))
+            match.hits.append((start, snippet))
+        for match in matches.values():
+            match.hits.sort(key=lambda hit: hit[0] or 0.0)
+        return list(matches.values())
+
+
+def index_transcript_file(index: TranscriptIndex, path: str) -> tuple[str, Optional[str], Optional[str]]:
+    try:
+        count = index.index_file(path)
+    except Exception as exc:  # noqa: BLE001
+        return path, None, str(exc)
+    return path, None if count is None else str(count), None
+
+
+class TranscriptIndexer(FilePipeline):
+    """Feed converted subtitles into a TranscriptIndex on one background thread, so SQLite sees a single writer."""
+
+    def __init__(
+        self,
+        index: TranscriptIndex,
+        on_result: Callable[[str, Optional[str], Optional[str]], None],
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        pool = ThreadPoolExecutor(max_workers=1)
+        super().__init__(pool, functools.partial(index_transcript_file, index), on_result, metrics, "index")
+
+
+class PlaylistEntry:
+    __slots__ = ("video_id", "title", "url", "duration", "upload_date", "view_count", "source", "status")
+
+    def __init__(self, video: dict[str, Any], source: str = "") -> None:
+        self.video_id: str = video["id"]
+        self.title: str = video["title"]
+        self.url: str = video["url"]
+        self.duration: Optional[float] = video.get("duration")
+        self.upload_date: str = video.get("upload_date") or ""
+        self.view_count: Optional[int] = video.get("view_count")
+        self.source = source
+        self.status = ""
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.video_id,
+            "title": self.title,
+            "url": self.url,
+            "duration": self.duration,
+            "upload_date": self.upload_date,
+            "view_count": self.view_count,
+        }
+
+
+@dataclass
+class PlaylistQuery:
+    """A parsed filter: title word prefixes plus optional duration, date and view-count bounds."""
+
+    words: list[str] = field(default_factory=list)
+    min_duration: Optional[float] = None
+    max_duration: Optional[float] = None
+    date_prefix: str = ""
+    min_views: Optional[int] = None
+
+    @property
+    def has_bounds(self) -> bool:
+        bounds = (self.min_duration, self.max_duration, self.min_views)
+        return bool(self.date_prefix) or any(bound is not None for bound in bounds)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.words and not self.has_bounds
+
+    def matches(self, entry: PlaylistEntry) -> bool:
+        if self.min_duration is not None and (entry.duration is None or entry.duration < self.min_duration):
+            return False
+        if self.max_duration is not None and (entry.duration is None or entry.duration > self.max_duration):
+            return False
+        if self.date_prefix and not entry.upload_date.startswith(self.date_prefix):
+            return False
+        if self.min_views is not None and (entry.view_count is None or entry.view_count < self.min_views):
+            return False
+        return True
+
+
+def parse_count(text: str) -> Optional[int]:
+    multiplier = COUNT_SUFFIXES.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in COUNT_SUFFIXES else text
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        return None
+
+
+def parse_playlist_query(text: str) -> PlaylistQuery:
+    """Parse filter text such as ``interview year:2023 >20m views:10k``.
+
+    ``>N``/``<N`` bound the duration (minutes by default, or with an ``s``/``m``/``h`` suffix),
+    ``year:``/``date:`` match the start of the upload date (``2023``, ``2023-05``), ``views:`` sets a
+    minimum view count, and every other word must prefix a word in the title.
+    """
+    query = PlaylistQuery()
+    for part in text.lower().split():
+        duration = DURATION_FILTER_RE.match(part)
+        key, _, value = part.partition(":")
+        if duration:
+            seconds = float(duration.group(2)) * DURATION_UNITS[duration.group(3)]
+            if duration.group(1) == ">":
+                query.min_duration = seconds
+            else:
+                query.max_duration = seconds
+        elif value and key in ("year", "date"):
+            query.date_prefix = re.sub(r"\D", "", value)
+        elif value and key == "views":
+            query.min_views = parse_count(value)
+        else:
+            query.words.extend(TITLE_TOKEN_RE.findall(part))
+    return query
+
+
+class TitleIndex:
+    """Inverted index from lower-cased title words to video IDs, with prefix lookups on a sorted vocabulary."""
+
+    def __init__(self) -> None:
+        self.postings: dict[str, set[str]] = {}
+        self._vocabulary: list[str] = []
+        self._stale = False
+
+    def clear(self) -> None:
+        self.postings = {}
+        self._vocabulary = []
+        self._stale = False
+
+    def add(self, video_id: str, title: str) -> None:
+        for token in set(TITLE_TOKEN_RE.findall(title.lower())):
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = {video_id}
+                self._stale = True
+            else:
+                ids.add(video_id)
+
+    def prefix_ids(self, prefix: str) -> set[str]:
+        if self._stale:
+            self._vocabulary = sorted(self.postings)
+            self._stale = False
+        exact = self.postings.get(prefix)
+        matches = set(exact) if exact else set()
+        start = bisect.bisect_right(self._vocabulary, prefix)
+        for token in itertools.islice(self._vocabulary, start, None):
+            if not token.startswith(prefix):
+                break
+            matches |= self.postings[token]
+        return matches
+
+
+class PlaylistModel:
+    """Compact playlist store keyed by video ID, with checked state kept in an integer bitset.
+
+    Entries are grouped by the source (playlist or channel URL) that listed them first, in the order
+    sources were added. A video listed by several sources is stored once; every source still
+    remembers the IDs it listed, so its own listing can be cached.
+    """
+
+    def __init__(self) -> None:
+        self.entries: list[PlaylistEntry] = []
+        self.positions: dict[str, int] = {}
+        self.title_index = TitleIndex()
+        self.sources: dict[str, list[str]] = {}
+        self.duplicates = 0
+        self._group_sizes: dict[str, int] = {}
+        self._checked = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        self.entries = []
+        self.positions = {}
+        self.title_index.clear()
+        self.sources = {}
+        self.duplicates = 0
+        self._group_sizes = {}
+        self._checked = 0
+
+    def add_source(self, source: str) -> None:
+        self.sources.setdefault(source, [])
+        self._group_sizes.setdefault(source, 0)
+
+    def extend(self, videos: Iterable[dict[str, Any]], source: str = "") -> int:
+        """Append videos to the end of their source's group; returns how many were new."""
+        return self._insert(videos, source, at_start=False)
+
+    def prepend(self, videos: Iterable[dict[str, Any]], source: str = "") -> int:
+        """Insert videos at the start of their source's group, e.g. uploads newer than a cached listing."""
+        return self._insert(videos, source, at_start=True)
+
+    def source_entries(self, source: str) -> list[PlaylistEntry]:
+        """Every entry ``source`` listed, in its order, including videos grouped under another source."""
+        return [self.entries[self.positions[video_id]] for video_id in self.sources.get(source, ())]
+
+    def _insert(self, videos: Iterable[dict[str, Any]], source: str, at_start: bool) -> int:
+        self.add_source(source)
+        listed: list[str] = []
+        fresh: list[PlaylistEntry] = []
+        fresh_ids: set[str] = set()
+        for video in videos:
+            video_id = video["id"]
+            if video_id in fresh_ids:
+                continue
+            listed.append(video_id)
+            if video_id in self.positions:
+                self.duplicates += 1
+                continue
+            fresh_ids.add(video_id)
+            fresh.append(PlaylistEntry(video, source))
+        if at_start:
+            self.sources[source][:0] = listed
+        else:
+            self.sources[source].extend(listed)
+        if not fresh:
+            return 0
+        position = 0
+        for name, size in self._group_sizes.items():
+            if name == source:
+                break
+            position += size
+        if not at_start:
+            position += self._group_sizes[source]
+        self._group_sizes[source] += len(fresh)
+        for entry in fresh:
+            self.title_index.add(entry.video_id, entry.title)
+        if position == len(self.entries):
+            for entry in fresh:
+                self.positions[entry.video_id] = len(self.entries)
+                self.entries.append(entry)
+            return len(fresh)
+        self.entries[position:position] = fresh
+        for index in range(position, len(self.entries)):
+            self.positions[self.entries[index].video_id] = index
+        below = self._checked & ((1 << position) - 1)
+        self._checked = below | (self._checked >> position << (position + len(fresh)))
+        return len(fresh)
+
+    def get(self, video_id: str) -> Optional[PlaylistEntry]:
+        position = self.positions.get(video_id)
+        return None if position is None else self.entries[position]
+
+    def search(self, query: PlaylistQuery) -> list[int]:
+        """Positions of the entries matching ``query``, in playlist order."""
+        candidates: Optional[set[str]] = None
+        # Longer prefixes match fewer titles, so intersecting them first keeps the sets small.
+        for word in sorted(set(query.words), key=len, reverse=True):
+            ids = self.title_index.prefix_ids(word)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        entries = self.entries
+        if candidates is None:
+            positions: list[int] = list(range(len(entries)))
+        elif len(candidates) * 8 < len(entries):
+            positions = sorted(self.positions[video_id] for video_id in candidates)
+        else:
+            positions = [position for position, entry in enumerate(entries) if entry.video_id in candidates]
+        if not query.has_bounds:
+            return positions
+        return [position for position in positions if query.matches(entries[position])]
+
+    def is_checked(self, index: int) -> bool:
+        return bool(self._checked >> index & 1)
+
+    def set_checked(self, index: int, checked: bool) -> None:
+        if checked:
+            self._checked |= 1 << index
+        else:
+            self._checked &= ~(1 << index)
+
+    def check_positions(self, positions: Iterable[int]) -> None:
+        # Build the mask as a bit string; OR-ing one big int per position would be quadratic.
+        bits = bytearray(b"0" * len(self.entries))
+        for position in positions:
+            bits[position] = ord("1")
+        if bits:
+            self._checked |= int(bits[::-1].decode(), 2)
+
+    def toggle(self, index: int) -> None:
+        self._checked ^= 1 << index
+
+    def select_all(self) -> None:
+        self._checked = (1 << len(self.entries)) - 1
+
+    def clear_checked(self) -> None:
+        self._checked = 0
+
+    def invert(self) -> None:
+        self._checked ^= (1 << len(self.entries)) - 1
+
+    def checked_count(self) -> int:
+        return self._checked.bit_count()
+
+    def checked_entries(self) -> list[PlaylistEntry]:
+        bits = bin(self._checked)[:1:-1]
+        return [self.entries[index] for index, bit in enumerate(bits) if bit == "1"]
+
+
+class DownloadArchive:
+    """In-memory set of video IDs recorded in a yt-dlp --download-archive file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.ids: set[str] = set()
+        self._mtime: Optional[float] = None
+        self.refresh()
+
+    def __contains__(self, video_id: object) -> bool:
+        return video_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def refresh(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        ids: set[str] = set()
+        with open(self.path, "r", encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                parts = line.split()
+                if len(parts) == 2:
+                    ids.add(parts[1])
+        self.ids = ids
+        self._mtime = mtime
+
+    def add(self, video_id: str) -> None:
+        self.ids.add(video_id)
+
+
+class ResidentWorker:
+    """A long-lived Python process with yt_dlp already imported, running one command line at a time."""
+
+    def __init__(self) -> None:
+        self.process = subprocess.Popen(
+            [sys.executable, YT_DLP_WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        self.return_code: Optional[int] = None
+        self.busy = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def submit(self, args: list[str]) -> None:
+        """Start a job; ``args`` are yt-dlp arguments without the executable."""
+        self.return_code = None
+        self.busy = True
+        assert self.process.stdin is not None
+        self.process.stdin.write(json.dumps(args) + "\n")
+        self.process.stdin.flush()
+
+    def output(self) -> Iterator[str]:
+        """Yield the current job's output lines; ``return_code`` is set once the job ends."""
+        for line in self.process.stdout or []:
+            if line.startswith(WORKER_EXIT_MARKER):
+                self.return_code = int(line[len(WORKER_EXIT_MARKER):])
+                self.busy = False
+                return
+            yield line
+        # The worker exited mid-job, usually because the job was cancelled.
+        self.return_code = self.process.wait() or 1
+
+    def run(self, args: list[str], on_line: Callable[[str], None]) -> int:
+        self.submit(args)
+        for line in self.output():
+            on_line(line)
+        assert self.return_code is not None
+        return self.return_code
+
+    def close(self) -> None:
+        try:
+            if self.process.stdin is not None:
+                self.process.stdin.close()
+        except OSError:
+            pass
+        terminate_process(self.process)
+
+
+class ResidentWorkerPool:
+    """Idle resident workers kept across jobs so each job skips yt-dlp start-up.
+
+    Cancelling a job terminates its worker; dead workers are dropped on release and replaced on demand.
+    """
+
+    def __init__(self) -> None:
+        self._idle: list[ResidentWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self) -> ResidentWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive:
+                    return worker
+        return ResidentWorker()
+
+    def release(self, worker: ResidentWorker) -> None:
+        with self._lock:
+            if not self._closed and worker.alive and not worker.busy:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+    def warm(self, count: int) -> None:
+        """Start workers ahead of the first jobs so their import cost overlaps other work."""
+        with self._lock:
+            missing = max(0, count - len(self._idle))
+        for _ in range(missing):
+            self.release(ResidentWorker())
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+class FlatPlaylistReader:
+    """Stream entries from a ``--flat-playlist --dump-json`` enumeration as yt-dlp prints them.
+
+    With a worker pool the enumeration runs on a resident worker, whose stdout and stderr share a pipe;
+    lines that are not playlist entries are collected as stderr.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        executable: str = YT_DLP_EXEC,
+        worker_pool: Optional[ResidentWorkerPool] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.url = url
+        self.metrics = metrics
+        self.records = 0
+        self._started = time.monotonic()
+        self._stderr_chunks: list[str] = []
+        self._worker_pool = worker_pool
+        self._worker: Optional[ResidentWorker] = None
+        self._lines: Iterator[str]
+        if worker_pool is not None:
+            self._worker = worker_pool.acquire()
+            self.process = self._worker.process
+            self._worker.submit(flat_playlist_command(url, executable)[1:])
+            self._lines = self._worker.output()
+            self._record("fetch.spawn_seconds", time.monotonic() - self._started)
+            return
+        self.process = subprocess.Popen(
+            flat_playlist_command(url, executable),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        self._record("fetch.spawn_seconds", time.monotonic() - self._started)
+        self._lines = iter(self.process.stdout or [])
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_reader.start()
+
+    def _read_stderr(self) -> None:
+        self._stderr_chunks.extend(self.process.stderr or [])
+
+    def _record(self, name: str, value: float) -> None:
+        if self.metrics is not None:
+            self.metrics.record(name, value)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for line in self._lines:
+            video = parse_flat_playlist_line(line)
+            if video is not None:
+                if not self.records:
+                    self._record("fetch.first_record_seconds", time.monotonic() - self._started)
+                self.records += 1
+                yield video
+            elif self._worker is not None:
+                self._stderr_chunks.append(line)
+
+    def stop(self) -> None:
+        terminate_process(self.process)
+
+    def wait(self) -> tuple[int, str]:
+        if self.metrics is not None and self.records:
+            self.metrics.record("fetch.records", self.records)
+            self.metrics.record_rate("fetch.records_per_second", self.records, time.monotonic() - self._started)
+        if self._worker is not None and self._worker_pool is not None:
+            self._stderr_chunks.extend(self._lines)
+            return_code = self._worker.return_code or 0
+            self._worker_pool.release(self._worker)
+            return return_code, "".join(self._stderr_chunks)
+        return_code = self.process.wait()
+        self._stderr_reader.join()
+        return return_code, "".join(self._stderr_chunks)
+
+
+class PlaylistFetcher:
+    """Enumerate several playlists or channels at once on a bounded pool of flat-playlist readers.
+
+    Each source's entries are reported in batches as yt-dlp prints them. For a source with known IDs
+    (a cached listing), enumeration stops at the first known video and the newer ones are reported
+    together with ``at_start`` set, to go ahead of the cached entries. That only holds for listings
+    that put new uploads first (see ``lists_newest_first``); other playlists need a full fetch.
+    """
+
+    def __init__(
+        self,
+        executable: str = YT_DLP_EXEC,
+        worker_pool: Optional[ResidentWorkerPool] = None,
+        concurrency: int = FETCH_CONCURRENCY,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.executable = executable
+        self.worker_pool = worker_pool
+        self.metrics = metrics
+        self.concurrency = max(1, concurrency)
+        self._stopped = threading.Event()
+        self._readers: set[FlatPlaylistReader] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def fetch(
+        self,
+        urls: Iterable[str],
+        on_videos: Callable[[str, list[dict[str, Any]], bool], None],
+        on_finished: Callable[[str, int, str], None],
+        known_ids: Optional[dict[str, set[str]]] = None,
+    ) -> None:
+        """Blocking: report ``(url, videos, at_start)`` batches and ``(url, return_code, stderr)`` per URL."""
+        urls = list(urls)
+        if not urls:
+            return
+        known_ids = known_ids or {}
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(urls))) as pool:
+            for url in urls:
+                pool.submit(self._fetch_one, url, on_videos, on_finished, known_ids.get(url))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            readers = list(self._readers)
+        for reader in readers:
+            reader.stop()
+
+    def _fetch_one(
+        self,
+        url: str,
+        on_videos: Callable[[str, list[dict[str, Any]], bool], None],
+        on_finished: Callable[[str, int, str], None],
+        known_ids: Optional[set[str]],
+    ) -> None:
+        if self._stopped.is_set():
+            return
+        try:
+            reader = FlatPlaylistReader(url, self.executable, self.worker_pool, self.metrics)
+        except OSError as exc:
+            on_finished(url, 1, f"Failed to start yt-dlp: {exc}")
+            return
+        with self._lock:
+            self._readers.add(reader)
+        if self._stopped.is_set():
+            reader.stop()
+
+        batch: list[dict[str, Any]] = []
+        new_videos: list[dict[str, Any]] = []
+        reached_known = False
+        last_flush = time.monotonic()
+        for video in reader:
+            if known_ids is not None:
+                if video["id"] in known_ids:
+                    reached_known = True
+                    reader.stop()
+                    break
+                new_videos.append(video)
+                continue
+            batch.append(video)
+            now = time.monotonic()
+            if len(batch) >= FETCH_BATCH_SIZE or now - last_flush >= FETCH_BATCH_INTERVAL:
+                on_videos(url, batch, False)
+                batch = []
+                last_flush = now
+        if batch:
+            on_videos(url, batch, False)
+        if new_videos:
+            on_videos(url, new_videos, True)
+
+        return_code, stderr_text = reader.wait()
+        with self._lock:
+            self._readers.discard(reader)
+        on_finished(url, 0 if reached_known else return_code, stderr_text)
+
+
+class PlaylistCache:
+    """SQLite cache of flat-playlist listings keyed by normalized URL."""
+
+    def __init__(self, path: str, ttl: float = PLAYLIST_CACHE_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect_database(self.path, timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS playlists ("
+            "url TEXT PRIMARY KEY, fetched_at REAL NOT NULL, entries TEXT NOT NULL)"
+        )
+        return conn
+
+    def load(self, url: str) -> Optional[tuple[float, list[dict[str, Any]]]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT fetched_at, entries FROM playlists WHERE url = ?",
+                (normalize_playlist_url(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl
+
+    def save(self, url: str, entries: list[dict[str, Any]], full: bool = True) -> None:
+        """Store a listing; ``full=False`` marks an incremental refresh that only fetched new uploads.
+
+        ``fetched_at`` only moves for full fetches, so the TTL still forces a periodic re-crawl that
+        picks up edits and deletions of older entries.
+        """
+        payload = json.dumps(entries, ensure_ascii=False, separators=(",", ":"))
+        update = "entries = excluded.entries" + (", fetched_at = excluded.fetched_at" if full else "")
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO playlists (url, fetched_at, entries) VALUES (?, ?, ?) "
+                f"ON CONFLICT(url) DO UPDATE SET {update}",
+                (normalize_playlist_url(url), time.time(), payload),
+            )
+
+
+def probe_command(
+    url: str,
+    executable: str = YT_DLP_EXEC,
+    cookies_browser: Optional[str] = None,
+    cookies_file: Optional[str] = None,
+) -> list[str]:
+    return [
+        executable,
+        "--dump-json",
+        "--no-playlist",
+        "--skip-download",
+        "--no-warnings",
+        *cookie_args(cookies_browser, cookies_file),
+        url,
+    ]
+
+
+def parse_probe_output(text: str) -> dict[str, Any]:
+    """Reduce yt-dlp's ``--dump-json`` info to the duration and a compact format list."""
+    info = json.loads(text)
+    duration = info.get("duration")
+    formats = []
+    for fmt in info.get("formats") or []:
+        if fmt.get("ext") == "mhtml" or not fmt.get("format_id"):
+            continue  # storyboard images
+        tbr = fmt.get("tbr")
+        size = fmt.get("filesize") or fmt.get("filesize_approx")
+        if size is None and tbr and duration:
+            size = tbr * duration * 125  # kbit/s over the whole video, in bytes
+        formats.append(
+            {
+                "id": fmt["format_id"],
+                "ext": fmt.get("ext") or "",
+                "height": fmt.get("height"),
+                "vcodec": fmt.get("vcodec") or "none",
+                "acodec": fmt.get("acodec") or "none",
+                "tbr": tbr or 0,
+                "size": size,
+            }
+        )
+    return {"duration": duration, "formats": formats}
+
+
+class FormatChoice(NamedTuple):
+    format_id: str
+    size: Optional[float]
+
+
+def choose_format(probe: dict[str, Any], mode: str, quality: Optional[str] = None) -> Optional[FormatChoice]:
+    """Pick the format yt-dlp would be asked for in ``mode``/``quality``: tallest video, then highest bitrate."""
+    formats = probe.get("formats") or []
+    audio = [fmt for fmt in formats if fmt["vcodec"] == "none" and fmt["acodec"] != "none"]
+    best_audio = max(audio, key=lambda fmt: fmt["tbr"], default=None)
+    if mode == "audio":
+        return None if best_audio is None else FormatChoice(best_audio["id"], best_audio["size"])
+    if mode != "video":
+        return None
+
+    limit = QUALITY_HEIGHT_LIMITS.get(quality or "")
+
+    def fits(fmt: dict[str, Any]) -> bool:
+        return fmt["vcodec"] != "none" and bool(fmt["height"]) and (limit is None or fmt["height"] <= limit)
+
+    def rank(fmt: dict[str, Any]) -> tuple[int, float]:
+        return fmt["height"], fmt["tbr"]
+
+    video_only = max((fmt for fmt in formats if fits(fmt) and fmt["acodec"] == "none"), key=rank, default=None)
+    combined = max((fmt for fmt in formats if fits(fmt) and fmt["acodec"] != "none"), key=rank, default=None)
+    if video_only is not None and best_audio is not None and (combined is None or rank(video_only) >= rank(combined)):
+        sizes = (video_only["size"], best_audio["size"])
+        total = None if None in sizes else sum(sizes)
+        return FormatChoice(f"{video_only['id']}+{best_audio['id']}", total)
+    if combined is not None:
+        return FormatChoice(combined["id"], combined["size"])
+    return None
+
+
+class FormatCache:
+    """SQLite cache of probed format lists keyed by video ID."""
+
+    def __init__(self, path: str, ttl: float = FORMAT_CACHE_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect_database(self.path, timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS formats ("
+            "video_id TEXT PRIMARY KEY, probed_at REAL NOT NULL, probe TEXT NOT NULL)"
+        )
+        return conn
+
+    def load_many(self, video_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Fresh cached probes for the given IDs."""
+        found: dict[str, dict[str, Any]] = {}
+        ids = list(video_ids)
+        cutoff = time.time() - self.ttl
+        with closing(self._connect()) as conn:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT video_id, probe FROM formats WHERE probed_at > ? AND video_id IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    (cutoff, *chunk),
+                ).fetchall()
+                found.update((video_id, json.loads(probe)) for video_id, probe in rows)
+        return found
+
+    def save(self, video_id: str, probe: dict[str, Any]) -> None:
+        payload = json.dumps(probe, separators=(",", ":"))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO formats (video_id, probed_at, probe) VALUES (?, ?, ?)",
+                (video_id, time.time(), payload),
+            )
+
+
+class FormatProber:
+    """Probe format lists for many videos on a bounded thread pool, reusing fresh cache entries.
+
+    Probes use the same cookies as downloads: a cookies file, a browser, or a ``cookie_cache`` that is
+    exported once before probing (falling back to reading the browser if that fails).
+    """
+
+    def __init__(
+        self,
+        cache: FormatCache,
+        executable: str = YT_DLP_EXEC,
+        concurrency: int = PROBE_CONCURRENCY,
+        cookies_browser: Optional[str] = None,
+        cookies_file: Optional[str] = None,
+        cookie_cache: Optional["BrowserCookieCache"] = None,
+    ) -> None:
+        self.cache = cache
+        self.executable = executable
+        self.concurrency = max(1, concurrency)
+        self.cookies_browser = cookies_browser
+        self.cookies_file = cookies_file
+        self.cookie_cache = cookie_cache
+        self._stopped = threading.Event()
+        self._processes: set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    def probe(
+        self,
+        targets: Iterable[tuple[str, str]],
+        on_result: Callable[[str, Optional[dict[str, Any]], Optional[str]], None],
+    ) -> None:
+        """Blocking: report ``(video_id, probe, error)`` for every ``(video_id, url)`` target."""
+        targets = [(video_id, url) for video_id, url in targets if video_id]
+        try:
+            cached = self.cache.load_many(video_id for video_id, _ in targets)
+        except (sqlite3.Error, ValueError):
+            cached = {}
+        for video_id, probe in cached.items():
+            on_result(video_id, probe, None)
+        pending = [(video_id, url) for video_id, url in targets if video_id not in cached]
+        if not pending:
+            return
+        if self.cookie_cache is not None:
+            if self.cookie_cache.ensure():
+                self.cookies_browser, self.cookies_file = None, self.cookie_cache.path
+            else:
+                self.cookies_browser, self.cookies_file = self.cookie_cache.browser, None
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(pending))) as pool:
+            for video_id, url in pending:
+                pool.submit(self._probe_one, video_id, url, on_result)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            terminate_process(process)
+
+    def _probe_one(
+        self,
+        video_id: str,
+        url: str,
+        on_result: Callable[[str, Optional[dict[str, Any]], Optional[str]], None],
+    ) -> None:
+        if self._stopped.is_set():
+            return
+        try:
+            process = subprocess.Popen(
+                probe_command(url, self.executable, self.cookies_browser, self.cookies_file),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except OSError as exc:
+            on_result(video_id, None, str(exc))
+            return
+        with self._lock:
+            self._processes.add(process)
+        stdout, stderr = process.communicate()
+        with self._lock:
+            self._processes.discard(process)
+        if self._stopped.is_set():
+            return
+        if process.returncode != 0:
+            lines = stderr.strip().splitlines()
+            on_result(video_id, None, lines[-1] if lines else f"yt-dlp exited with code {process.returncode}")
+            return
+        try:
+            probe = parse_probe_output(stdout)
+        except ValueError as exc:
+            on_result(video_id, None, f"Unreadable yt-dlp output: {exc}")
+            return
+        try:
+            self.cache.save(video_id, probe)
+        except sqlite3.Error:
+            pass
+        on_result(video_id, probe, None)
+
+
+@dataclass
+class JobProgress:
+    status: str
+    downloaded_bytes: Optional[float]
+    total_bytes: Optional[float]
+    speed: Optional[float]
+    eta: Optional[float]
+    fragment_index: Optional[int]
+    fragment_count: Optional[int]
+    updated_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def percent(self) -> Optional[float]:
+        if self.downloaded_bytes is not None and self.total_bytes:
+            return min(100.0, self.downloaded_bytes * 100 / self.total_bytes)
+        if self.fragment_index is not None and self.fragment_count:
+            return min(100.0, self.fragment_index * 100 / self.fragment_count)
+        return None
+
+
+def parse_progress_line(line: str) -> Optional[JobProgress]:
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    values = line[len(PROGRESS_PREFIX):].split()
+    if len(values) != len(PROGRESS_FIELDS):
+        return None
+    fields = dict(zip(PROGRESS_FIELDS, values))
+
+    def number(name: str) -> Optional[float]:
+        try:
+            return float(fields[name])
+        except ValueError:
+            return None
+
+    fragment_index = number("fragment_index")
+    fragment_count = number("fragment_count")
+    return JobProgress(
+        status=fields["status"],
+        downloaded_bytes=number("downloaded_bytes"),
+        total_bytes=number("total_bytes") or number("total_bytes_estimate"),
+        speed=number("speed"),
+        eta=number("eta"),
+        fragment_index=None if fragment_index is None else int(fragment_index),
+        fragment_count=None if fragment_count is None else int(fragment_count),
+    )
+
+
+@dataclass
+class DownloadJob:
+    index: int
+    url: str
+    cmd: list[str]
+    video_id: str = ""
+    state: str = JOB_QUEUED
+    return_code: Optional[int] = None
+    error: str = ""
+    error_kind: str = ""
+    retries: int = 0
+    progress: Optional[JobProgress] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    first_output_at: Optional[float] = None
+    last_output_at: Optional[float] = None
+    output_path: str = ""
+    subtitle_paths: list[str] = field(default_factory=list)
+    process: Optional[subprocess.Popen] = field(default=None, repr=False)
+
+    def reset_attempt(self) -> None:
+        """Forget the outcome of the previous attempt before the job is retried."""
+        self.return_code = None
+        self.error = ""
+        self.error_kind = ""
+        self.progress = None
+        self.started_at = self.finished_at = self.first_output_at = self.last_output_at = None
+        self.subtitle_paths = []
+
+    @property
+    def is_stalled(self) -> bool:
+        # Subtitle and archive-skip runs never print progress, so only a transfer that started can stall.
+        return (
+            self.state == JOB_RUNNING
+            and self.progress is not None
+            and time.monotonic() - (self.last_output_at or self.progress.updated_at) > STALL_SECONDS
+        )
+
+
+class JournalBatch:
+    """One download batch in the job journal; every write is its own committed transaction.
+
+    Writes share one connection, opened on first use and guarded by a lock, because the scheduler
+    writes from every worker thread on each state change.
+    """
+
+    def __init__(self, journal: "JobJournal", batch_id: int, mode: str, output_dir: str, cookies_browser: str) -> None:
+        self.journal = journal
+        self.batch_id = batch_id
+        self.mode = mode
+        self.output_dir = output_dir
+        self.cookies_browser = cookies_browser
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, rows: list[tuple[Any, ...]]) -> None:
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.journal._connect()
+            with self._conn:
+                self._conn.executemany(sql, rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add_jobs(self, jobs: Iterable[DownloadJob]) -> None:
+        rows = [
+            (self.batch_id, job.index, job.url, job.video_id, json.dumps(job.cmd[1:]), job.state, time.time())
+            for job in jobs
+        ]
+        self._write(
+            "INSERT OR IGNORE INTO jobs (batch_id, idx, url, video_id, args, state, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def track(self, jobs: Iterable[DownloadJob]) -> Iterator[DownloadJob]:
+        """Journal jobs from a lazy source as the scheduler pulls them."""
+        for job in jobs:
+            self.add_jobs([job])
+            yield job
+
+    def update(self, job: DownloadJob) -> None:
+        self._write(
+            "UPDATE jobs SET state = ?, return_code = ?, error = ?, output_path = ?, updated_at = ? "
+            "WHERE batch_id = ? AND idx = ?",
+            [(job.state, job.return_code, job.error, job.output_path, time.time(), self.batch_id, job.index)],
+        )
+
+    def finish(self) -> None:
+        self._write("UPDATE batches SET finished = 1 WHERE id = ?", [(self.batch_id,)])
+
+    def pending_jobs(self, executable: str = YT_DLP_EXEC) -> list[DownloadJob]:
+        """Jobs that did not finish successfully, rebuilt against the current yt-dlp executable."""
+        with closing(self.journal._connect()) as conn:
+            rows = conn.execute(
+                "SELECT idx, url, video_id, args, output_path FROM jobs "
+                "WHERE batch_id = ? AND state != ? ORDER BY idx",
+                (self.batch_id, JOB_DONE),
+            ).fetchall()
+        return [
+            DownloadJob(index=idx, url=url, cmd=[executable, *json.loads(args)], video_id=video_id, output_path=path)
+            for idx, url, video_id, args, path in rows
+        ]
+
+    def job_count(self) -> int:
+        with closing(self.journal._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE batch_id = ?", (self.batch_id,)).fetchone()[0]
+
+
+class JobJournal:
+    """SQLite journal of download batches and their jobs, so interrupted batches can be resumed.
+
+    A batch stays unfinished until its scheduler runs it to completion; if it is cancelled, or the app is
+    closed or crashes first, its jobs that are not done run again on resume and yt-dlp continues any
+    partial files.
+    """
+
+    def __init__(self, path: str = JOB_JOURNAL_PATH) -> None:
+        self.path = path
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect_database(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._schema_lock:
+            if not self._schema_ready:
+                self._create_schema(conn)
+                self._schema_ready = True
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        # WAL mode is stored in the database file, so it only needs setting once.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, mode TEXT NOT NULL, output_dir TEXT NOT NULL, "
+            "cookies_browser TEXT NOT NULL, finished INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "batch_id INTEGER NOT NULL, idx INTEGER NOT NULL, url TEXT NOT NULL, video_id TEXT NOT NULL, "
+            "args TEXT NOT NULL, state TEXT NOT NULL, return_code INTEGER, error TEXT NOT NULL DEFAULT '', "
+            "output_path TEXT NOT NULL DEFAULT '', updated_at REAL NOT NULL, PRIMARY KEY (batch_id, idx))"
+        )
+
+    def start_batch(self, mode: str, output_dir: str, cookies_browser: Optional[str] = None) -> JournalBatch:
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO batches (created_at, mode, output_dir, cookies_browser) VALUES (?, ?, ?, ?)",
+                (time.time(), mode, output_dir, cookies_browser or ""),
+            )
+            batch_id = cursor.lastrowid
+        assert batch_id is not None
+        return JournalBatch(self, batch_id, mode, output_dir, cookies_browser or "")
+
+    def unfinished_batches(self) -> list[tuple[JournalBatch, int]]:
+        """Unfinished batches, newest first, with their number of jobs left to run."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT b.id, b.mode, b.output_dir, b.cookies_browser, "
+                "(SELECT COUNT(*) FROM jobs j WHERE j.batch_id = b.id AND j.state != ?) "
+                "FROM batches b WHERE b.finished = 0 ORDER BY b.id DESC",
+                (JOB_DONE,),
+            ).fetchall()
+        return [(JournalBatch(self, *row[:4]), row[4]) for row in rows]
+
+    def discard(self, batch: JournalBatch) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM jobs WHERE batch_id = ?", (batch.batch_id,))
+            conn.execute("DELETE FROM batches WHERE id = ?", (batch.batch_id,))
+
+    def prune(self) -> None:
+        """Drop finished batches; only unfinished work needs to survive a restart."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM jobs WHERE batch_id IN (SELECT id FROM batches WHERE finished = 1)")
+            conn.execute("DELETE FROM batches WHERE finished = 1")
+
+
+def read_cookie_expiry(path: str) -> Optional[float]:
+    """Earliest expiry of the YouTube/Google sign-in cookies in a Netscape cookies.txt, if any."""
+    earliest: Optional[float] = None
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            if line.startswith("#HttpOnly_"):
+                line = line[len("#HttpOnly_"):]
+            elif line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 7 or fields[5] not in COOKIE_AUTH_NAMES:
+                continue
+            if not fields[0].lstrip(".").endswith(COOKIE_AUTH_DOMAINS):
+                continue
+            try:
+                expires = float(fields[4])
+            except ValueError:
+                continue
+            if expires > 0 and (earliest is None or expires < earliest):
+                earliest = expires
+    return earliest
+
+
+class BrowserCookieCache:
+    """Browser cookies exported once into a private cookies.txt and shared by every yt-dlp run.
+
+    The export is redone when the file is missing or old, when sign-in cookies are about to expire,
+    or after a job reports an authentication error. A failed export is tried again after
+    COOKIE_EXPORT_RETRY seconds or an authentication error; until then callers fall back.
+    """
+
+    def __init__(self, browser: str, executable: str = YT_DLP_EXEC, directory: str = COOKIE_CACHE_DIR) -> None:
+        self.browser = browser
+        self.executable = executable
+        self.directory = directory
+        safe_name = re.sub(r"[^\w.-]+", "_", browser)
+        self.path = os.path.join(directory, f"cookies-{safe_name}.txt")
+        self.error: Optional[str] = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stale = False
+        self._exported_at: Optional[float] = None
+        self._expires_at: Optional[float] = None
+        try:
+            self._expires_at = read_cookie_expiry(self.path)
+        except OSError:
+            pass
+
+    def needs_refresh(self) -> bool:
+        if self._stale:
+            return True
+        try:
+            age = time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return True
+        if age > COOKIE_CACHE_MAX_AGE:
+            return True
+        return self._expires_at is not None and self._expires_at - time.time() < COOKIE_REFRESH_MARGIN
+
+    def ensure(self) -> bool:
+        """Export the cookies if needed. False means export failed and callers should fall back."""
+        with self._lock:
+            if self.error is not None and time.monotonic() - (self._failed_at or 0) >= COOKIE_EXPORT_RETRY:
+                self.error = None
+            if self.error is None and self.needs_refresh():
+                self.error = self._export()
+                self._failed_at = None if self.error is None else time.monotonic()
+            return self.error is None
+
+    def mark_stale(self, started_at: Optional[float]) -> None:
+        """Re-export before the next job, unless the cookies were refreshed after ``started_at``."""
+        with self._lock:
+            if self._exported_at is None or started_at is None or started_at >= self._exported_at:
+                self._stale = True
+            # The browser may have been unlocked or closed since the export last failed.
+            if self._failed_at is not None and started_at is not None and started_at >= self._failed_at:
+                self.error = None
+
+    def prepare(self, job: DownloadJob) -> bool:
+        """Export the cookies if needed before ``job`` runs; if that fails, let it read the browser itself."""
+        if self.ensure():
+            return True
+        job.cmd = self.fallback_command(job.cmd)
+        return False
+
+    def fallback_command(self, cmd: list[str]) -> list[str]:
+        """Swap ``--cookies <cache>`` for ``--cookies-from-browser`` in a yt-dlp command."""
+        for index in range(len(cmd) - 1):
+            if cmd[index] == "--cookies" and cmd[index + 1] == self.path:
+                return [*cmd[:index], "--cookies-from-browser", self.browser, *cmd[index + 2:]]
+        return cmd
+
+    def _export(self) -> Optional[str]:
+        part_path = self.path + ".part"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            os.chmod(self.directory, 0o700)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            # Without a URL yt-dlp exits with a usage error, but saves the cookie jar on the way out.
+            result = subprocess.run(
+                [self.executable, "--ignore-config", "--cookies-from-browser", self.browser, "--cookies", part_path],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+            )
+            if not os.path.isfile(part_path) or os.path.getsize(part_path) == 0:
+                errors = [line for line in result.stderr.splitlines() if line.startswith("ERROR:")]
+                return errors[0] if errors else f"yt-dlp exited with code {result.returncode}"
+            os.chmod(part_path, 0o600)
+            os.replace(part_path, self.path)
+            self._expires_at = read_cookie_expiry(self.path)
+        except OSError as exc:
+            return str(exc)
+        self._exported_at = time.monotonic()
+        self._stale = False
+        return None
+
+
+def with_cookie_cache(
+    jobs: Iterable[DownloadJob],
+    cache: BrowserCookieCache,
+    on_fallback: Callable[[str], None],
+) -> Iterator[DownloadJob]:
+    """Refresh the cookie cache as jobs are handed out; if export fails, let yt-dlp read the browser itself."""
+    reported = False
+    for job in jobs:
+        if not cache.prepare(job) and not reported:
+            on_fallback(cache.error or "")
+            reported = True
+        yield job
+
+
+class LogBuffer:
+    """Thread-safe ring buffer of log messages, optionally spooled to a rotating file."""
+
+    def __init__(self, capacity: int = LOG_BUFFER_CAPACITY, spool_path: Optional[str] = None) -> None:
+        self._messages: collections.deque[str] = collections.deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._spool: Optional[logging.Logger] = None
+        if spool_path:
+            handler = logging.handlers.RotatingFileHandler(
+                spool_path,
+                maxBytes=LOG_FILE_MAX_BYTES,
+                backupCount=LOG_FILE_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.terminator = ""
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._spool = logging.getLogger(f"{__name__}.spool.{id(self)}")
+            self._spool.setLevel(logging.INFO)
+            self._spool.propagate = False
+            self._spool.addHandler(handler)
+
+    def write(self, message: str) -> None:
+        with self._lock:
+            if len(self._messages) == self._messages.maxlen:
+                self.dropped += 1
+            self._messages.append(message)
+        if self._spool is not None:
+            self._spool.info(message)
+
+    def drain(self) -> tuple[list[str], int]:
+        with self._lock:
+            messages = list(self._messages)
+            self._messages.clear()
+            dropped, self.dropped = self.dropped, 0
+        return messages, dropped
+
+    def close(self) -> None:
+        if self._spool is not None:
+            for handler in list(self._spool.handlers):
+                handler.close()
+                self._spool.removeHandler(handler)
+
+
+class ThrottleSupervisor:
+    """Adaptive concurrency, shared backoff and retry decisions for one download batch.
+
+    A rate limit or sign-in challenge pauses every worker for an exponentially growing, jittered
+    interval and halves the number of parallel jobs; a network error gives up one slot. Each
+    RAMP_UP_SECONDS without such errors gives one slot back, up to the configured concurrency.
+    Failed jobs are retried with exponential backoff and jitter, but only for transient errors.
+    """
+
+    def __init__(
+        self,
+        retries: int = RETRY_LIMIT,
+        on_notice: Optional[Callable[[str], None]] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.max_limit = self.limit = 1
+        self.retries = max(0, retries)
+        self.on_notice = on_notice
+        self.metrics = metrics
+        self.paused_until = 0.0
+        self._condition = threading.Condition()
+        self._active = 0
+        self._strikes = 0
+        self._throttled_at = float("-inf")
+        self._stepped_down_at = float("-inf")
+        self._steady_since = time.monotonic()
+        self._cancelled = False
+
+    def begin(self, concurrency: int) -> None:
+        """Start a batch with up to ``concurrency`` jobs at once; the scheduler calls this."""
+        with self._condition:
+            self.max_limit = self.limit = max(1, concurrency)
+            self._steady_since = time.monotonic()
+            self._cancelled = False
+
+    def retry_limit(self, kind: str) -> int:
+        if kind in (ERROR_RATE_LIMIT, ERROR_NETWORK):
+            return self.retries
+        # A fresh cookie export is worth one more try; after that the sign-in problem is not transient.
+        return min(1, self.retries) if kind == ERROR_AUTH else 0
+
+    def acquire(self) -> bool:
+        """Wait for a free slot outside any shared pause. False means the batch was cancelled."""
+        with self._condition:
+            while not self._cancelled:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self._active < self.limit:
+                    self._active += 1
+                    return True
+                self._condition.wait(wait if wait > 0 else None)
+            return False
+
+    def release(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def job_finished(self, job: DownloadJob) -> Optional[float]:
+        """Adjust the pace for how ``job`` ended; return the delay before retrying it, or None."""
+        now = time.monotonic()
+        kind = job.error_kind if job.return_code else ""
+        notice = ""
+        with self._condition:
+            # Jobs that were already running when we last backed off report the same episode again. A
+            # network step-down never excuses a rate limit, but a throttle episode covers both.
+            started = float("inf") if job.started_at is None else job.started_at
+            if kind in (ERROR_RATE_LIMIT, ERROR_AUTH) and started >= self._throttled_at:
+                self._strikes += 1
+                pause = jitter(min(THROTTLE_MAX_DELAY, THROTTLE_BASE_DELAY * 2 ** (self._strikes - 1)))
+                self.paused_until = max(self.paused_until, now + pause)
+                self._throttled_at = self._steady_since = now
+                self._set_limit(self.limit // 2)
+                notice = f"YouTube reported a {kind} error: pausing {pause:.0f} s"
+                notice += f", then continuing with {self.limit} parallel download(s)."
+                if self.metrics is not None:
+                    self.metrics.record("throttle.pause_seconds", pause)
+            elif (
+                kind == ERROR_NETWORK
+                and started >= max(self._throttled_at, self._stepped_down_at)
+                and self.limit > 1
+            ):
+                self._stepped_down_at = self._steady_since = now
+                self._set_limit(self.limit - 1)
+                notice = f"Network errors: continuing with {self.limit} parallel download(s)."
+            elif job.return_code == 0 and now - self._steady_since >= RAMP_UP_SECONDS:
+                self._steady_since = now
+                self._strikes = 0
+                if self.limit < self.max_limit:
+                    self._set_limit(self.limit + 1)
+                    notice = f"No errors for a while: raising to {self.limit} parallel download(s)."
+            retry = not self._cancelled and job.return_code != 0 and job.retries < self.retry_limit(kind)
+        if notice and self.on_notice is not None:
+            self.on_notice(notice + "\n")
+        if not retry:
+            return None
+        delay = jitter(min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** job.retries))
+        if self.metrics is not None:
+            self.metrics.record("retry.delay_seconds", delay)
+        return delay
+
+    def _set_limit(self, limit: int) -> None:
+        self.limit = max(1, min(limit, self.max_limit))
+        if self.metrics is not None:
+            self.metrics.record("throttle.concurrency", self.limit)
+        self._condition.notify_all()
+
+
+def jitter(delay: float) -> float:
+    """Half of ``delay`` plus a random share of the other half, so retries from parallel jobs spread out."""
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class DownloadScheduler:
+    """Run download jobs as concurrent yt-dlp processes on a fixed-size worker pool.
+
+    Jobs are pulled lazily from any iterable, so long URL lists are never held in memory. With a
+    ``worker_pool`` each job runs on a resident worker instead of a freshly launched binary. With a
+    ``supervisor`` the number of jobs actually running follows its adaptive limit, and jobs that fail
+    with a transient error are queued again after its backoff delay.
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[DownloadJob],
+        concurrency: int,
+        on_output: Callable[[DownloadJob, str], None],
+        on_state: Callable[[DownloadJob], None],
+        on_finished: Callable[[dict[str, int]], None],
+        worker_pool: Optional[ResidentWorkerPool] = None,
+        journal: Optional[JournalBatch] = None,
+        metrics: Optional[Metrics] = None,
+        supervisor: Optional[ThrottleSupervisor] = None,
+    ) -> None:
+        self.concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+        if isinstance(jobs, Sized):
+            self.concurrency = min(self.concurrency, len(jobs) or 1)
+        self.on_output = on_output
+        self.on_state = on_state
+        self.on_finished = on_finished
+        self.worker_pool = worker_pool
+        self.journal = journal
+        self.metrics = metrics
+        self.supervisor = supervisor
+        self._jobs = iter(jobs)
+        self._jobs_ready = threading.Condition()
+        self._jobs_exhausted = False
+        self._jobs_pulling = False
+        self._retries: list[tuple[float, int, DownloadJob]] = []
+        self._retry_order = itertools.count()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._running: list[DownloadJob] = []
+        self._counts = {state: 0 for state in JOB_STATES}
+        self._workers_left = self.concurrency
+        self._finish_reported = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> None:
+        if self.worker_pool is not None:
+            self.worker_pool.warm(self.concurrency)
+        if self.supervisor is not None:
+            self.supervisor.begin(self.concurrency)
+        for _ in range(self.concurrency):
+            threading.Thread(target=self._run_worker, daemon=True).start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self.supervisor is not None:
+            self.supervisor.cancel()
+        with self._jobs_ready:
+            self._jobs_exhausted = True
+            self._jobs_ready.notify_all()
+        self._maybe_finish()
+        for job in self.running_jobs():
+            if job.process is not None:
+                terminate_process(job.process)
+
+    def running_jobs(self) -> list[DownloadJob]:
+        with self._lock:
+            return list(self._running)
+
+    def summary(self) -> dict[str, int]:
+        with self._lock:
+            counts = dict(self._counts)
+            counts[JOB_RUNNING] = len(self._running)
+        # Retries are counted per attempt; the job itself is counted again when it finally ends.
+        counts["retried"] = counts.pop(JOB_RETRYING)
+        return counts
+
+    def _next_job(self) -> Optional[DownloadJob]:
+        """The next due retry or new job; waits while retries are pending or may still be scheduled.
+
+        The job source may block (stdin, playlist expansion, cookie export), so one worker at a time
+        pulls from it without holding the lock that retries and finishing jobs need.
+        """
+        while True:
+            with self._jobs_ready:
+                if self._cancelled.is_set():
+                    # Stop pulling: expanding playlists or reading stdin only to cancel each job is wasted work.
+                    self._jobs_exhausted = True
+                now = time.monotonic()
+                if self._retries and (self._retries[0][0] <= now or self._cancelled.is_set()):
+                    self._in_flight += 1
+                    return heapq.heappop(self._retries)[2]
+                if not self._jobs_exhausted and not self._jobs_pulling:
+                    self._jobs_pulling = True
+                else:
+                    if self._jobs_exhausted and not self._retries:
+                        if not (self.supervisor is not None and self._in_flight):
+                            return None
+                    self._jobs_ready.wait(self._retries[0][0] - now if self._retries else None)
+                    continue
+            job: Optional[DownloadJob] = None
+            try:
+                job = next(self._jobs, None)
+            finally:
+                with self._jobs_ready:
+                    self._jobs_pulling = False
+                    if job is None:
+                        self._jobs_exhausted = True
+                    else:
+                        self._in_flight += 1
+                    self._jobs_ready.notify_all()
+            if job is not None:
+                return job
+
+    def _run_worker(self) -> None:
+        try:
+            while True:
+                job = self._next_job()
+                if job is None:
+                    break
+                try:
+                    if self._cancelled.is_set():
+                        self._set_state(job, JOB_CANCELLED)
+                    elif self.supervisor is None:
+                        self._run_job(job)
+                    elif not self.supervisor.acquire():
+                        self._set_state(job, JOB_CANCELLED)
+                    else:
+                        try:
+                            self._run_job(job)
+                        finally:
+                            self.supervisor.release()
+                finally:
+                    with self._jobs_ready:
+                        self._in_flight -= 1
+                        self._jobs_ready.notify_all()
+        finally:
+            with self._jobs_ready:
+                self._workers_left -= 1
+            self._maybe_finish()
+
+    def _maybe_finish(self) -> None:
+        with self._jobs_ready:
+            # After a cancel, a worker blocked on the job source (say, an idle stdin) must not hold up the end.
+            blocked = 1 if self._jobs_pulling and self._cancelled.is_set() else 0
+            if self._finish_reported or self._workers_left > blocked:
+                return
+            self._finish_reported = True
+        # Cancelled batches stay unfinished in the journal so they can still be resumed.
+        if self.journal is not None and not self.cancelled:
+            self._write_journal(self.journal.finish)
+        if self.journal is not None:
+            self.journal.close()
+        self.on_finished(self.summary())
+
+    def _run_job(self, job: DownloadJob) -> None:
+        if job.retries:
+            job.reset_attempt()
+        worker: Optional[ResidentWorker] = None
+        spawn_started = time.monotonic()
+        try:
+            if self.worker_pool is not None:
+                worker = self.worker_pool.acquire()
+                process = worker.process
+            else:
+                process = subprocess.Popen(job.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        except OSError:
+            self.on_output(job, "Failed to start yt-dlp. Check the executable path.\n")
+            self._set_state(job, JOB_FAILED)
+            return
+
+        with self._lock:
+            job.process = process
+            job.started_at = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.record("job.spawn_seconds", job.started_at - spawn_started)
+        self._set_state(job, JOB_RUNNING)
+        if self._cancelled.is_set():
+            terminate_process(process)
+
+        if worker is not None and self.worker_pool is not None:
+            try:
+                return_code = worker.run(job.cmd[1:], lambda line: self._handle_output(job, line))
+            except OSError:
+                return_code = worker.process.wait() or 1
+            self.worker_pool.release(worker)
+        else:
+            for line in process.stdout or []:
+                self._handle_output(job, line)
+            return_code = process.wait()
+        with self._lock:
+            job.process = None
+            job.return_code = return_code
+            job.finished_at = time.monotonic()
+        if self.metrics is not None:
+            self._record_job_metrics(job, spawn_started)
+        retry_delay: Optional[float] = None
+        if self.supervisor is not None and not self._cancelled.is_set():
+            retry_delay = self.supervisor.job_finished(job)
+        if return_code == 0:
+            self._set_state(job, JOB_DONE)
+        elif self._cancelled.is_set():
+            self._set_state(job, JOB_CANCELLED)
+        elif retry_delay is not None:
+            self._schedule_retry(job, retry_delay)
+        else:
+            self._set_state(job, JOB_FAILED)
+
+    def _schedule_retry(self, job: DownloadJob, delay: float) -> None:
+        assert self.supervisor is not None
+        job.retries += 1
+        limit = self.supervisor.retry_limit(job.error_kind)
+        self.on_output(job, f"Retrying in {delay:.0f} s after a {job.error_kind} error ({job.retries}/{limit}).\n")
+        self._set_state(job, JOB_RETRYING)
+        with self._jobs_ready:
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._retry_order), job))
+            self._jobs_ready.notify_all()
+
+    def _record_job_metrics(self, job: DownloadJob, spawn_started: float) -> None:
+        assert self.metrics is not None and job.started_at is not None and job.finished_at is not None
+        if job.first_output_at is not None:
+            self.metrics.record("job.first_output_seconds", job.first_output_at - spawn_started)
+        if job.return_code != 0:
+            return
+        wall = job.finished_at - job.started_at
+        self.metrics.record("job.wall_seconds", wall)
+        if job.progress is not None and job.progress.downloaded_bytes:
+            self.metrics.record_rate("job.bytes_per_second", job.progress.downloaded_bytes, wall)
+
+    def _handle_output(self, job: DownloadJob, line: str) -> None:
+        job.last_output_at = time.monotonic()
+        if job.first_output_at is None:
+            job.first_output_at = job.last_output_at
+        progress = parse_progress_line(line)
+        if progress is not None:
+            job.progress = progress
+            return
+        if line.startswith("ERROR:"):
+            job.error = line.strip()
+            job.error_kind = classify_error(line) or job.error_kind
+        output_path = parse_output_path(line)
+        if output_path is not None and SUBTITLE_PATH_RE.match(line):
+            job.subtitle_paths.append(output_path)
+        if output_path is not None and output_path != job.output_path:
+            job.output_path = output_path
+            if self.journal is not None:
+                self._write_journal(self.journal.update, job)
+        self.on_output(job, line)
+
+    def _write_journal(self, write: Callable[..., None], *args: Any) -> None:
+        try:
+            write(*args)
+        except sqlite3.Error:
+            # The journal only enables resuming; a locked or broken database must not stop downloads.
+            pass
+
+    def _set_state(self, job: DownloadJob, state: str) -> None:
+        with self._lock:
+            if job.state == JOB_RUNNING and job in self._running:
+                self._running.remove(job)
+            job.state = state
+            if state == JOB_RUNNING:
+                self._running.append(job)
+            else:
+                self._counts[state] += 1
+        if self.journal is not None:
+            self._write_journal(self.journal.update, job)
+        self.on_state(job)
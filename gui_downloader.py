@@ -1,43 +1,103 @@
 #!/usr/bin/env python3
 """Simple Tkinter wrapper around yt-dlp_macos for pasting URLs and cookies."""
-import html
-import json
+import argparse
+import multiprocessing
 import os
-import re
 import shlex
-import subprocess
+import sqlite3
 import threading
+import time
 import tkinter as tk
+import webbrowser
 from tkinter import filedialog, messagebox, ttk
-from typing import Optional
-
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-YT_DLP_EXEC = os.path.join(BASE_DIR, "yt-dlp_macos")
-DEFAULT_COOKIES = os.path.join(BASE_DIR, "cookies.txt")
-VIDEO_QUALITY_OPTIONS = {
-    "Best available": "bestvideo+bestaudio/best",
-    "1080p": "bestvideo[height<=1080]+bestaudio/best[height<=1080]",
-    "720p": "bestvideo[height<=720]+bestaudio/best[height<=720]",
-    "480p": "bestvideo[height<=480]+bestaudio/best[height<=480]",
-}
-
-COOKIES_BROWSER_CHOICES = {
-    "Chrome": "chrome",
-    "Brave": "brave",
-    "Edge": "edge",
-    "Firefox": "firefox",
-    "Safari": "safari",
-}
+from typing import Any, Callable, Iterable, Optional
+
+from downloader_core import (
+    AUDIO_BITRATES,
+    AUDIO_FORMATS,
+    AUDIO_NATIVE,
+    AUTH_ERROR_RE,
+    COOKIES_BROWSER_CHOICES,
+    DEFAULT_AUDIO_BITRATE,
+    DEFAULT_AUDIO_FORMAT,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_COOKIES,
+    FORMAT_CACHE_PATH,
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_JOURNAL_PATH,
+    JOB_RETRYING,
+    MAX_CONCURRENCY,
+    PLAYLIST_CACHE_PATH,
+    SUBTITLE_EXTENSIONS,
+    TRANSCRIPT_INDEX_PATH,
+    VIDEO_QUALITY_OPTIONS,
+    YT_DLP_EXEC,
+    AudioTranscoder,
+    BrowserCookieCache,
+    DownloadArchive,
+    DownloadJob,
+    DownloadScheduler,
+    FormatCache,
+    FormatProber,
+    JobJournal,
+    JournalBatch,
+    LogBuffer,
+    Metrics,
+    PlaylistCache,
+    PlaylistFetcher,
+    PlaylistModel,
+    ResidentWorkerPool,
+    SubtitlePipeline,
+    ThrottleSupervisor,
+    TranscriptIndex,
+    TranscriptIndexer,
+    archive_path,
+    build_download_command,
+    choose_format,
+    convert_subtitle_files,
+    find_subtitle_files,
+    format_bytes,
+    format_duration,
+    is_text_current,
+    lists_newest_first,
+    parse_playlist_query,
+    pin_format,
+    resident_backend_available,
+    source_label,
+    split_urls,
+    timestamp_url,
+    with_cookie_cache,
+)
+
+LOG_FLUSH_INTERVAL_MS = 100
+LOG_MAX_LINES = 5000
+PLAYLIST_VISIBLE_ROWS = 6
+PROGRESS_REFRESH_MS = 500
+EVENT_LAG_PROBE_MS = 500
+STATS_REFRESH_MS = 1000
 
 
 class DownloaderUI:
-    def __init__(self, root: tk.Tk) -> None:
+    def __init__(self, root: tk.Tk, log_max_lines: int = LOG_MAX_LINES, log_file: Optional[str] = None) -> None:
         self.root = root
         self.root.title("YouTube Downloader")
-        self.root.geometry("640x560")
+        self.root.geometry("680x810")
         self.is_running = False
         self.is_fetching = False
-        self.worker: Optional[threading.Thread] = None
+        self.fetcher: Optional[PlaylistFetcher] = None
+        self.fetch_stopped = False
+        self.playlist_cache = PlaylistCache(PLAYLIST_CACHE_PATH)
+        self.archives: dict[str, DownloadArchive] = {}
+        self.current_archive = DownloadArchive("")
+        self.scheduler: Optional[DownloadScheduler] = None
+        self.download_jobs: list[DownloadJob] = []
+        self.download_total = 0
+        self.job_journal = JobJournal(JOB_JOURNAL_PATH)
+        self.active_archive = DownloadArchive("")
+        self.log_max_lines = max(1, log_max_lines)
+        self.log_buffer = LogBuffer(spool_path=log_file)
 
         main = ttk.Frame(root, padding=12)
         main.pack(fill=tk.BOTH, expand=True)
@@ -52,18 +112,45 @@ class DownloaderUI:
         self.browser_var = tk.StringVar()
         if COOKIES_BROWSER_CHOICES:
             self.browser_var.set(next(iter(COOKIES_BROWSER_CHOICES)))
-        self.playlist_videos: list[dict[str, str]] = []
-        self.playlist_item_urls: dict[str, str] = {}
-        self.playlist_checks: dict[str, bool] = {}
+        self.concurrency_var = tk.IntVar(value=DEFAULT_CONCURRENCY)
+        self.skip_archived_var = tk.BooleanVar(value=True)
+        self.resident_var = tk.BooleanVar(value=False)
+        self.auto_convert_var = tk.BooleanVar(value=True)
+        self.subtitle_pipeline: Optional[SubtitlePipeline] = None
+        self.transcript_index = TranscriptIndex(TRANSCRIPT_INDEX_PATH)
+        self.metrics = Metrics()
+        self.stats_window: Optional[tk.Toplevel] = None
+        self.transcript_indexer: Optional[TranscriptIndexer] = None
+        self.search_window: Optional[tk.Toplevel] = None
+        self.audio_format_var = tk.StringVar(value=DEFAULT_AUDIO_FORMAT)
+        self.audio_bitrate_var = tk.StringVar(value=DEFAULT_AUDIO_BITRATE)
+        self.audio_transcoder: Optional[AudioTranscoder] = None
+        self.worker_pool: Optional[ResidentWorkerPool] = None
+        self.cookie_caches: dict[str, BrowserCookieCache] = {}
+        self.cookie_cache: Optional[BrowserCookieCache] = None
+        self.playlist = PlaylistModel()
+        self.playlist_offset = 0
+        self.playlist_cursor = 0
+        self.filter_var = tk.StringVar()
+        self.playlist_view: Optional[list[int]] = None
+        self._filter_pending = False
+        self._filter_text = ""
+        self.format_cache = FormatCache(FORMAT_CACHE_PATH)
+        self.format_probes: dict[str, dict[str, Any]] = {}
+        self.prober: Optional[FormatProber] = None
+        self._estimate_pending = False
+        self._playlist_rows_shown = 0
+        self._playlist_render_pending = False
         self.checkbox_images = {
             False: self._create_checkbox_image(False),
             True: self._create_checkbox_image(True),
         }
 
-        ttk.Label(main, text="YouTube URL:").grid(row=0, column=0, sticky=tk.W)
-        url_entry = ttk.Entry(main, textvariable=self.url_var, width=60)
-        url_entry.grid(row=0, column=1, columnspan=2, sticky=tk.EW, padx=(0, 4))
+        ttk.Label(main, text="YouTube URLs:").grid(row=0, column=0, sticky=tk.W)
+        url_entry = ttk.Entry(main, textvariable=self.url_var, width=48)
+        url_entry.grid(row=0, column=1, sticky=tk.EW, padx=(0, 4))
         url_entry.focus()
+        ttk.Button(main, text="Load URLs…", command=self.load_url_file).grid(row=0, column=2, sticky=tk.E)
         self.fetch_button = ttk.Button(main, text="Fetch Videos", command=self.fetch_playlist, width=14)
         self.fetch_button.grid(row=0, column=3, sticky=tk.E, padx=(4, 0))
 
@@ -141,72 +228,206 @@ class DownloaderUI:
             width=18,
         )
         self.quality_box.grid(row=1, column=1, columnspan=2, sticky=tk.W, pady=(8, 0))
+        self.quality_box.bind("<<ComboboxSelected>>", lambda event: self._refresh_size_estimate())
+
+        ttk.Label(options_frame, text="Parallel downloads:").grid(row=2, column=0, sticky=tk.W, pady=(8, 0))
+        ttk.Spinbox(
+            options_frame,
+            from_=1,
+            to=MAX_CONCURRENCY,
+            textvariable=self.concurrency_var,
+            width=5,
+        ).grid(row=2, column=1, columnspan=2, sticky=tk.W, pady=(8, 0))
+        ttk.Checkbutton(
+            options_frame,
+            text="Skip videos already in the download archive",
+            variable=self.skip_archived_var,
+        ).grid(row=3, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
+        resident_check = ttk.Checkbutton(
+            options_frame,
+            text="Keep yt-dlp loaded between jobs (needs the yt_dlp Python package)",
+            variable=self.resident_var,
+        )
+        resident_check.grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
+        if not resident_backend_available():
+            resident_check.state(["disabled"])
+        ttk.Checkbutton(
+            options_frame,
+            text="Convert downloaded subtitles to text as each video finishes",
+            variable=self.auto_convert_var,
+        ).grid(row=5, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
+
+        ttk.Label(options_frame, text="Audio format:").grid(row=6, column=0, sticky=tk.W, pady=(8, 0))
+        audio_frame = ttk.Frame(options_frame)
+        audio_frame.grid(row=6, column=1, columnspan=2, sticky=tk.W, pady=(8, 0))
+        self.audio_format_box = ttk.Combobox(
+            audio_frame,
+            textvariable=self.audio_format_var,
+            values=[*AUDIO_FORMATS, AUDIO_NATIVE],
+            state="readonly",
+            width=8,
+        )
+        self.audio_format_box.grid(row=0, column=0, sticky=tk.W)
+        self.audio_format_box.bind("<<ComboboxSelected>>", lambda event: self.update_quality_state())
+        self.audio_bitrate_box = ttk.Combobox(
+            audio_frame,
+            textvariable=self.audio_bitrate_var,
+            values=list(AUDIO_BITRATES),
+            state="readonly",
+            width=6,
+        )
+        self.audio_bitrate_box.grid(row=0, column=1, sticky=tk.W, padx=(8, 0))
 
         self.playlist_frame = ttk.LabelFrame(main, text="Playlist Videos", padding=8)
         self.playlist_frame.grid(row=4, column=0, columnspan=4, sticky=tk.NSEW, pady=(12, 0))
         self.playlist_frame.columnconfigure(0, weight=1)
-        self.playlist_frame.rowconfigure(0, weight=1)
+        self.playlist_frame.rowconfigure(1, weight=1)
+
+        filter_frame = ttk.Frame(self.playlist_frame)
+        filter_frame.grid(row=0, column=0, columnspan=4, sticky=tk.EW, pady=(0, 8))
+        filter_frame.columnconfigure(1, weight=1)
+        ttk.Label(filter_frame, text="Filter:").grid(row=0, column=0, sticky=tk.W)
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        filter_entry.grid(row=0, column=1, sticky=tk.EW, padx=(4, 4))
+        filter_entry.bind("<Escape>", lambda event: self.filter_var.set(""))
+        ttk.Button(
+            filter_frame,
+            text="Check Matching",
+            command=self.check_matching_playlist,
+            width=16,
+        ).grid(row=0, column=2, sticky=tk.E)
+        self.estimate_button = ttk.Button(
+            filter_frame,
+            text="Estimate Sizes",
+            command=self.estimate_sizes,
+            width=14,
+        )
+        self.estimate_button.grid(row=0, column=3, sticky=tk.E, padx=(4, 0))
+        self.filter_var.trace_add("write", lambda *_: self._schedule_playlist_filter())
 
         self.playlist_tree = ttk.Treeview(
             self.playlist_frame,
-            columns=("title",),
+            columns=("title", "source", "duration", "date", "size", "status"),
             show="tree headings",
             selectmode="none",
-            height=6,
+            height=PLAYLIST_VISIBLE_ROWS,
         )
         self.playlist_tree.heading("#0", text="#")
         self.playlist_tree.column("#0", width=48, anchor=tk.CENTER, stretch=False)
         self.playlist_tree.heading("title", text="Video title")
         self.playlist_tree.column("title", anchor=tk.W)
-        self.playlist_tree.grid(row=0, column=0, columnspan=3, sticky=tk.NSEW)
+        self.playlist_tree.heading("source", text="Source")
+        self.playlist_tree.column("source", width=96, anchor=tk.W, stretch=False)
+        self.playlist_tree.heading("duration", text="Length")
+        self.playlist_tree.column("duration", width=64, anchor=tk.E, stretch=False)
+        self.playlist_tree.heading("date", text="Uploaded")
+        self.playlist_tree.column("date", width=84, anchor=tk.CENTER, stretch=False)
+        self.playlist_tree.heading("size", text="Size")
+        self.playlist_tree.column("size", width=72, anchor=tk.E, stretch=False)
+        self.playlist_tree.heading("status", text="Status")
+        self.playlist_tree.column("status", width=80, anchor=tk.CENTER, stretch=False)
+        self.playlist_tree.grid(row=1, column=0, columnspan=3, sticky=tk.NSEW)
         self.playlist_tree.bind("<Button-1>", self.on_playlist_click)
         self.playlist_tree.bind("<Return>", self.on_playlist_key_toggle)
         self.playlist_tree.bind("<space>", self.on_playlist_key_toggle)
-
-        playlist_scroll = ttk.Scrollbar(self.playlist_frame, command=self.playlist_tree.yview)
-        playlist_scroll.grid(row=0, column=3, sticky=tk.NS)
-        self.playlist_tree.configure(yscrollcommand=playlist_scroll.set)
+        self.playlist_tree.bind("<Up>", lambda event: self.move_playlist_cursor(-1))
+        self.playlist_tree.bind("<Down>", lambda event: self.move_playlist_cursor(1))
+        self.playlist_tree.bind("<Prior>", lambda event: self.move_playlist_cursor(-PLAYLIST_VISIBLE_ROWS))
+        self.playlist_tree.bind("<Next>", lambda event: self.move_playlist_cursor(PLAYLIST_VISIBLE_ROWS))
+        self.playlist_tree.bind("<MouseWheel>", self.on_playlist_wheel)
+        self.playlist_tree.bind("<Button-4>", lambda event: self.scroll_playlist(-1))
+        self.playlist_tree.bind("<Button-5>", lambda event: self.scroll_playlist(1))
+        self._playlist_row_ids = [
+            self.playlist_tree.insert("", tk.END, values=("", "", "", "", "", "")) for _ in range(PLAYLIST_VISIBLE_ROWS)
+        ]
+        for row_id in self._playlist_row_ids:
+            self.playlist_tree.detach(row_id)
+
+        self.playlist_scroll = ttk.Scrollbar(self.playlist_frame, command=self.on_playlist_scrollbar)
+        self.playlist_scroll.grid(row=1, column=3, sticky=tk.NS)
+        self.playlist_scroll.set(0.0, 1.0)
 
         self.playlist_status = ttk.Label(self.playlist_frame, text="Fetch a channel to list videos.")
-        self.playlist_status.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
+        self.playlist_status.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
 
+        selection_frame = ttk.Frame(self.playlist_frame)
+        selection_frame.grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=(8, 0))
         ttk.Button(
-            self.playlist_frame,
+            selection_frame,
             text="Select All",
             command=self.select_all_playlist,
             width=12,
-        ).grid(row=2, column=0, sticky=tk.W, pady=(8, 0))
+        ).pack(side=tk.LEFT)
         ttk.Button(
-            self.playlist_frame,
+            selection_frame,
             text="Clear Selection",
             command=self.clear_playlist_selection,
             width=16,
-        ).grid(row=2, column=1, sticky=tk.W, pady=(8, 0))
+        ).pack(side=tk.LEFT, padx=(4, 0))
         ttk.Button(
-            self.playlist_frame,
+            selection_frame,
+            text="Invert",
+            command=self.invert_playlist_selection,
+            width=8,
+        ).pack(side=tk.LEFT, padx=(4, 0))
+        convert_frame = ttk.Frame(self.playlist_frame)
+        convert_frame.grid(row=3, column=2, sticky=tk.E, pady=(8, 0))
+        ttk.Button(
+            convert_frame,
             text="Convert Subtitles…",
             command=self.convert_subtitles,
             width=20,
-        ).grid(row=2, column=2, sticky=tk.E, pady=(8, 0))
+        ).pack(side=tk.LEFT)
+        ttk.Button(
+            convert_frame,
+            text="Convert Folder…",
+            command=self.convert_subtitle_folder,
+            width=16,
+        ).pack(side=tk.LEFT, padx=(4, 0))
+        ttk.Button(
+            convert_frame,
+            text="Search Transcripts…",
+            command=self.open_transcript_search,
+            width=20,
+        ).pack(side=tk.LEFT, padx=(4, 0))
 
         self.playlist_frame.grid_remove()
 
-        self.download_button = ttk.Button(main, text="Download", command=self.start_download, width=18)
-        self.download_button.grid(row=5, column=0, columnspan=4, pady=12)
+        actions_frame = ttk.Frame(main)
+        actions_frame.grid(row=5, column=0, columnspan=4, pady=12)
+        self.download_button = ttk.Button(actions_frame, text="Download", command=self.start_download, width=18)
+        self.download_button.pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(actions_frame, text="Cancel", command=self.cancel_download, width=12)
+        self.cancel_button.pack(side=tk.LEFT, padx=(8, 0))
+        self.cancel_button.state(["disabled"])
+        ttk.Button(actions_frame, text="Stats", command=self.open_stats_panel, width=8).pack(side=tk.LEFT, padx=(8, 0))
+
+        self.progress_frame = ttk.LabelFrame(main, text="Active Downloads", padding=8)
+        self.progress_frame.grid(row=6, column=0, columnspan=4, sticky=tk.EW, pady=(0, 12))
+        self.progress_frame.columnconfigure(1, weight=1)
+        self.progress_rows: list[tuple[ttk.Label, ttk.Progressbar, ttk.Label]] = []
+        self.throughput_label = ttk.Label(self.progress_frame, text="")
+        self.throughput_label.grid(row=MAX_CONCURRENCY, column=0, columnspan=3, sticky=tk.W, pady=(4, 0))
+        self.progress_frame.grid_remove()
 
         self.output_text = tk.Text(main, height=12, state=tk.DISABLED)
-        self.output_text.grid(row=6, column=0, columnspan=4, sticky=tk.NSEW)
+        self.output_text.grid(row=7, column=0, columnspan=4, sticky=tk.NSEW)
 
         scrollbar = ttk.Scrollbar(main, command=self.output_text.yview)
-        scrollbar.grid(row=6, column=4, sticky=tk.NS)
+        scrollbar.grid(row=7, column=4, sticky=tk.NS)
         self.output_text.configure(yscrollcommand=scrollbar.set)
 
         main.columnconfigure(1, weight=1)
         main.columnconfigure(2, weight=0)
-        main.rowconfigure(6, weight=1)
+        main.rowconfigure(7, weight=1)
 
         self.update_cookies_state()
         self.update_quality_state()
+        self.output_var.trace_add("write", lambda *_: self._refresh_current_archive())
+
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self._flush_output)
+        self.root.after(0, self.offer_resume)
+        self._probe_event_lag(time.monotonic())
 
         if not os.path.isfile(YT_DLP_EXEC):
             messagebox.showerror("Missing binary", f"Cannot find yt-dlp executable at {YT_DLP_EXEC}")
@@ -219,6 +440,22 @@ class DownloaderUI:
             self.cookies_mode_var.set("file")
             self.update_cookies_state()
 
+    def load_url_file(self) -> None:
+        path = filedialog.askopenfilename(
+            title="Select a list of URLs",
+            filetypes=[("Text files", "*.txt"), ("All files", "*")],
+        )
+        if not path:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                lines = [line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#")]
+        except (OSError, UnicodeDecodeError) as exc:
+            messagebox.showerror("Load URLs", f"Cannot read {path}: {exc}")
+            return
+        urls = split_urls(" ".join([self.url_var.get(), *lines]))
+        self.url_var.set(" ".join(urls))
+
     def pick_output_dir(self) -> None:
         path = filedialog.askdirectory(title="Select download folder")
         if path:
@@ -233,97 +470,513 @@ class DownloaderUI:
         cookies = self.cookies_var.get().strip()
         output_dir = self.output_var.get().strip()
 
-        target_urls: list[str]
-
-        selection_urls = [self.playlist_item_urls[item] for item, checked in self.playlist_checks.items() if checked]
-        selected_from_playlist = bool(selection_urls)
-
-        if mode == "subs":
-            if selection_urls:
-                target_urls = selection_urls
-            elif url:
-                target_urls = [url]
-            else:
-                messagebox.showwarning("No videos selected", "Select videos in the playlist or provide a URL.")
-                return
-        else:
+        targets: list[tuple[str, str]] = [(entry.video_id, entry.url) for entry in self.playlist.checked_entries()]
+        selected_from_playlist = bool(targets)
+        if not targets:
             if not url:
-                messagebox.showwarning("Missing URL", "Please paste a YouTube URL.")
+                messagebox.showwarning("Missing URL", "Select videos in the playlist or paste a YouTube URL.")
                 return
-            target_urls = [url]
+            targets = [("", target_url) for target_url in split_urls(url)]
 
-        cmd = [YT_DLP_EXEC, "--newline"]
+        cookie_cache: Optional[BrowserCookieCache] = None
+        browser_key: Optional[str] = None
         if cookies_mode == "browser":
             browser_key = COOKIES_BROWSER_CHOICES.get(self.browser_var.get())
+            cookies = ""
             if browser_key:
-                cmd.extend(["--cookies-from-browser", browser_key])
+                cookie_cache = self.cookie_caches.setdefault(browser_key, BrowserCookieCache(browser_key))
+                cookies = cookie_cache.path
         else:
             if not cookies and os.path.isfile(DEFAULT_COOKIES):
                 cookies = DEFAULT_COOKIES
                 self.cookies_var.set(DEFAULT_COOKIES)
-            if cookies:
-                if not os.path.isfile(cookies):
-                    messagebox.showwarning("Cookies file missing", f"Cannot find cookies file at {cookies}.")
-                    return
-                cmd.extend(["--cookies", cookies])
-        if output_dir:
-            cmd.extend(["-P", output_dir])
-
-        if mode == "video":
-            quality = self.quality_var.get()
-            format_selector = VIDEO_QUALITY_OPTIONS.get(quality)
-            if format_selector:
-                cmd.extend(["-f", format_selector])
-        elif mode == "audio":
-            cmd.extend(["-f", "bestaudio/best", "-x", "--audio-format", "mp3"])
-        elif mode == "subs":
-            cmd.extend(["--skip-download", "--write-subs", "--write-auto-subs", "--sub-format", "best"])
-            if selected_from_playlist:
-                cmd.append("--no-playlist")
-
-        cmd.extend(target_urls)
+            if cookies and not os.path.isfile(cookies):
+                messagebox.showwarning("Cookies file missing", f"Cannot find cookies file at {cookies}.")
+                return
+
+        archive = self._get_archive(output_dir, mode)
+        cmd = build_download_command(
+            mode,
+            quality=self.quality_var.get(),
+            cookies_file=cookies,
+            output_dir=output_dir,
+            archive_file=archive.path,
+            single_video=selected_from_playlist,
+        )
+        if selected_from_playlist and self.skip_archived_var.get():
+            pending = [(video_id, target_url) for video_id, target_url in targets if video_id not in archive]
+            skipped = len(targets) - len(pending)
+            if skipped:
+                self.append_output(f"Skipping {skipped} video(s) already in {archive.path}.\n")
+            if not pending:
+                messagebox.showinfo("Nothing to download", "All selected videos are already in the download archive.")
+                return
+            targets = pending
+        self.active_archive = archive
+
+        jobs = [
+            DownloadJob(index=index, url=target_url, cmd=[*cmd, target_url], video_id=video_id)
+            for index, (video_id, target_url) in enumerate(targets, start=1)
+        ]
+        if mode in ("video", "audio"):
+            pinned = self._pin_probed_formats(jobs, mode)
+            if pinned:
+                self.append_output(f"Using probed exact formats for {pinned} of {len(jobs)} video(s).\n")
+        batch: Optional[JournalBatch] = None
+        try:
+            batch = self.job_journal.start_batch(mode, output_dir, browser_key)
+            batch.add_jobs(jobs)
+        except sqlite3.Error as exc:
+            self.append_output(f"Job journal unavailable, this batch cannot be resumed: {exc}\n")
+            batch = None
+        self._launch_jobs(jobs, len(jobs), mode, cookie_cache, batch)
+
+    def _launch_jobs(
+        self,
+        jobs: list[DownloadJob],
+        total: int,
+        mode: str,
+        cookie_cache: Optional[BrowserCookieCache],
+        batch: Optional[JournalBatch],
+    ) -> None:
+        self.cookie_cache = cookie_cache
+        self.subtitle_pipeline = None
+        if mode == "subs" and self.auto_convert_var.get():
+            self.subtitle_pipeline = SubtitlePipeline(self.on_subtitle_converted, metrics=self.metrics)
+            self.transcript_indexer = TranscriptIndexer(
+                self.transcript_index, self.on_transcript_indexed, self.metrics
+            )
+        self.audio_transcoder = None
+        if mode == "audio" and self.audio_format_var.get() != AUDIO_NATIVE:
+            self.audio_transcoder = AudioTranscoder(
+                self.on_audio_transcoded,
+                self.audio_format_var.get(),
+                self.audio_bitrate_var.get(),
+                metrics=self.metrics,
+            )
+        self.download_jobs = jobs
+        self.download_total = total
+        job_source: Iterable[DownloadJob] = jobs
+        if cookie_cache is not None:
+            job_source = with_cookie_cache(jobs, cookie_cache, self._on_cookie_export_failed)
+        self.scheduler = DownloadScheduler(
+            job_source,
+            min(self._get_concurrency(), len(jobs)),
+            on_output=self.on_job_output,
+            on_state=self.on_job_state,
+            on_finished=self.finish_download,
+            worker_pool=self._get_worker_pool(),
+            journal=batch,
+            metrics=self.metrics,
+            supervisor=ThrottleSupervisor(on_notice=self.append_output, metrics=self.metrics),
+        )
 
         self.is_running = True
         self.download_button.state(["disabled"])
-        display_cmd = " ".join(shlex.quote(part) for part in cmd)
+        self.cancel_button.state(["!disabled"])
+        for job in jobs:
+            if job.video_id:
+                self._set_playlist_item_status(job.video_id, job.state)
+        display_cmd = " ".join(shlex.quote(part) for part in jobs[0].cmd)
         self.append_output(f"Running: {display_cmd}\n")
+        if len(jobs) > 1:
+            self.append_output(
+                f"Queued {len(jobs)} jobs with up to {self.scheduler.concurrency} parallel downloads.\n"
+            )
+        self.scheduler.start()
+        self.progress_frame.grid()
+        self.root.after(PROGRESS_REFRESH_MS, self._refresh_progress)
+
+    def offer_resume(self) -> None:
+        try:
+            self.job_journal.prune()
+            unfinished = self.job_journal.unfinished_batches()
+            for batch, pending in unfinished:
+                if not pending:
+                    self.job_journal.discard(batch)
+        except sqlite3.Error as exc:
+            self.append_output(f"Job journal unavailable: {exc}\n")
+            return
+        unfinished = [(batch, pending) for batch, pending in unfinished if pending]
+        if not unfinished or self.is_running:
+            return
+        # Older unfinished batches are offered again on the next start.
+        batch, pending = unfinished[0]
+        folder = batch.output_dir or os.getcwd()
+        answer = messagebox.askyesnocancel(
+            "Resume downloads",
+            f"{pending} {batch.mode} job(s) into {folder} did not finish last time.\n\n"
+            "Resume them now? Choose No to discard them, or Cancel to ask again next time.",
+        )
+        if answer is None:
+            return
+        if not answer:
+            self.job_journal.discard(batch)
+            return
 
-        def worker() -> None:
-            try:
-                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-            except FileNotFoundError:
-                self.append_output("Failed to start yt-dlp. Check the executable path.\n")
-                self.finish_download()
-                return
+        jobs = batch.pending_jobs()
+        cookie_cache: Optional[BrowserCookieCache] = None
+        if batch.cookies_browser:
+            cookie_cache = self.cookie_caches.setdefault(
+                batch.cookies_browser, BrowserCookieCache(batch.cookies_browser)
+            )
+        self.active_archive = self._get_archive(batch.output_dir, batch.mode)
+        self.append_output(f"Resuming {len(jobs)} unfinished job(s) from a previous session.\n")
+        self._launch_jobs(jobs, batch.job_count(), batch.mode, cookie_cache, batch)
 
-            for line in process.stdout or []:
-                self.append_output(line)
-            return_code = process.wait()
-            if return_code == 0:
-                self.append_output("\nDownload completed successfully.\n")
-            else:
-                self.append_output(f"\nyt-dlp exited with code {return_code}.\n")
-            self.finish_download()
+    def cancel_download(self) -> None:
+        if self.scheduler is None or not self.is_running:
+            return
+        self.cancel_button.state(["disabled"])
+        self.append_output("Cancelling downloads…\n")
+        self.scheduler.cancel()
+
+    def on_job_output(self, job: DownloadJob, line: str) -> None:
+        if self.cookie_cache is not None and AUTH_ERROR_RE.search(line):
+            self.cookie_cache.mark_stale(job.started_at)
+        self.append_output(self._job_prefix(job) + line)
+
+    def _on_cookie_export_failed(self, error: str) -> None:
+        self.append_output(f"Could not cache browser cookies ({error}); each job will read the browser directly.\n")
+
+    def on_job_state(self, job: DownloadJob) -> None:
+        state = job.state
+        if state == JOB_DONE and self.subtitle_pipeline is not None:
+            self.subtitle_pipeline.submit(job.subtitle_paths)
+        if state == JOB_DONE and self.audio_transcoder is not None and job.output_path:
+            self.audio_transcoder.submit([job.output_path])
+        if state == JOB_RETRYING and self.cookie_cache is not None:
+            self.cookie_cache.prepare(job)
+        if state == JOB_DONE and job.video_id:
+            self.active_archive.add(job.video_id)
+        if state == JOB_DONE:
+            self.append_output(f"{self._job_prefix(job)}Download completed successfully.\n")
+        elif state == JOB_FAILED and job.return_code is not None:
+            self.append_output(f"{self._job_prefix(job)}yt-dlp exited with code {job.return_code}.\n")
+        if job.video_id:
+            self.root.after(0, lambda: self._set_playlist_item_status(job.video_id, state))
+
+    def finish_download(self, summary: dict[str, int]) -> None:
+        parts = [f"{summary[state]} {state}" for state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED) if summary[state]]
+        if summary["retried"]:
+            parts.append(f"{summary['retried']} retried")
+        self.append_output(f"\nAll jobs finished: {', '.join(parts) or 'nothing to do'}.\n")
+        pipeline = self.subtitle_pipeline
+        if pipeline is not None:
+            # Called on a scheduler thread, so waiting for the last conversions does not block the UI.
+            pipeline.close()
+            if pipeline.submitted:
+                failed = f", {pipeline.failed} failed" if pipeline.failed else ""
+                self.append_output(f"Converted {pipeline.converted} subtitle file(s) to text{failed}.\n")
+        indexer, self.transcript_indexer = self.transcript_indexer, None
+        if indexer is not None:
+            indexer.close()
+        transcoder = self.audio_transcoder
+        if transcoder is not None:
+            transcoder.close()
+            if transcoder.submitted:
+                failed = f", {transcoder.failed} failed" if transcoder.failed else ""
+                self.append_output(f"Transcoded {transcoder.converted} audio file(s){failed}.\n")
+        self.is_running = False
 
-        self.worker = threading.Thread(target=worker, daemon=True)
-        self.worker.start()
+        def finish() -> None:
+            self.download_button.state(["!disabled"])
+            self.cancel_button.state(["disabled"])
+            self.progress_frame.grid_remove()
 
-    def finish_download(self) -> None:
-        self.is_running = False
-        self.root.after(0, lambda: self.download_button.state(["!disabled"]))
+        self.root.after(0, finish)
+
+    def on_subtitle_converted(self, path: str, output_path: Optional[str], error: Optional[str]) -> None:
+        if error is None:
+            self.append_output(f"Converted: {path} -> {output_path}\n")
+            indexer = self.transcript_indexer
+            if indexer is not None:
+                indexer.submit([path])
+        else:
+            self.append_output(f"Conversion failed: {path} -> {error}\n")
+
+    def on_transcript_indexed(self, path: str, passages: Optional[str], error: Optional[str]) -> None:
+        if error is not None:
+            self.append_output(f"Could not index transcript {path}: {error}\n")
+
+    def on_audio_transcoded(self, path: str, output_path: Optional[str], error: Optional[str]) -> None:
+        if error is None:
+            self.append_output(f"Transcoded: {path} -> {output_path}\n")
+        else:
+            self.append_output(f"Transcoding failed: {path} -> {error}\n")
+
+    def _refresh_progress(self) -> None:
+        if not self.is_running or self.scheduler is None:
+            return
+        running = self.scheduler.running_jobs()
+        while len(self.progress_rows) < len(running):
+            row = len(self.progress_rows)
+            name = ttk.Label(self.progress_frame, width=32)
+            bar = ttk.Progressbar(self.progress_frame, maximum=100, mode="determinate")
+            detail = ttk.Label(self.progress_frame, width=28)
+            name.grid(row=row, column=0, sticky=tk.W)
+            bar.grid(row=row, column=1, sticky=tk.EW, padx=8)
+            detail.grid(row=row, column=2, sticky=tk.W)
+            self.progress_rows.append((name, bar, detail))
+
+        total_speed = 0.0
+        for row, (name, bar, detail) in enumerate(self.progress_rows):
+            widgets = (name, bar, detail)
+            if row >= len(running):
+                for widget in widgets:
+                    widget.grid_remove()
+                continue
+            job = running[row]
+            for widget in widgets:
+                widget.grid()
+            entry = self.playlist.get(job.video_id) if job.video_id else None
+            title = entry.title if entry is not None else job.url
+            name.configure(text=f"{job.index}. {title[:28]}")
+            progress = job.progress
+            percent = progress.percent if progress is not None else None
+            bar.configure(value=percent or 0)
+            if progress is None:
+                text = "starting…"
+            else:
+                total_speed += progress.speed or 0
+                text = f"{percent or 0:.0f}% · {format_bytes(progress.speed)}/s · ETA {format_duration(progress.eta)}"
+                if entry is not None:
+                    entry.status = f"{percent or 0:.0f}%"
+            if job.is_stalled:
+                text = "stalled · " + text
+            detail.configure(text=text)
+        if running:
+            self._schedule_playlist_render()
+
+        summary = self.scheduler.summary()
+        finished = summary[JOB_DONE] + summary[JOB_FAILED] + summary[JOB_CANCELLED]
+        total = len(self.download_jobs)
+        text = f"{len(running)} running · {format_bytes(total_speed)}/s total · {finished}/{total} finished"
+        supervisor = self.scheduler.supervisor
+        if supervisor is not None:
+            paused = supervisor.paused_until - time.monotonic()
+            if paused > 0:
+                text += f" · paused {paused:.0f} s"
+            if supervisor.limit < supervisor.max_limit:
+                text += f" · throttled to {supervisor.limit}"
+        self.throughput_label.configure(text=text)
+        self.root.after(PROGRESS_REFRESH_MS, self._refresh_progress)
+
+    def _job_prefix(self, job: DownloadJob) -> str:
+        if self.download_total <= 1:
+            return ""
+        return f"[{job.index}/{self.download_total}] "
+
+    def _get_worker_pool(self) -> Optional[ResidentWorkerPool]:
+        if not self.resident_var.get():
+            return None
+        if self.worker_pool is None:
+            self.worker_pool = ResidentWorkerPool()
+        return self.worker_pool
+
+    def _get_concurrency(self) -> int:
+        try:
+            value = int(self.concurrency_var.get())
+        except (tk.TclError, ValueError):
+            value = DEFAULT_CONCURRENCY
+        value = max(1, min(value, MAX_CONCURRENCY))
+        self.concurrency_var.set(value)
+        return value
 
     def append_output(self, message: str) -> None:
-        def write() -> None:
+        self.log_buffer.write(message)
+
+    def _flush_output(self) -> None:
+        messages, dropped = self.log_buffer.drain()
+        if messages:
+            self.metrics.record("ui.log_lines_per_flush", len(messages) + dropped)
+            if dropped:
+                messages.insert(0, f"… {dropped} log message(s) skipped …\n")
             self.output_text.configure(state=tk.NORMAL)
-            self.output_text.insert(tk.END, message)
+            self.output_text.insert(tk.END, "".join(messages))
+            line_count = int(self.output_text.index("end-1c").split(".")[0])
+            if line_count > self.log_max_lines:
+                self.output_text.delete("1.0", f"{line_count - self.log_max_lines + 1}.0")
             self.output_text.see(tk.END)
             self.output_text.configure(state=tk.DISABLED)
-
-        self.root.after(0, write)
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self._flush_output)
+
+    def _probe_event_lag(self, due: float) -> None:
+        # How late a timer fires is how long Tk's event queue kept it waiting.
+        now = time.monotonic()
+        self.metrics.record("ui.event_lag_seconds", max(0.0, now - due))
+        self.root.after(EVENT_LAG_PROBE_MS, self._probe_event_lag, now + EVENT_LAG_PROBE_MS / 1000)
+
+    def open_stats_panel(self) -> None:
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.deiconify()
+            self.stats_window.lift()
+            return
+        window = self.stats_window = tk.Toplevel(self.root)
+        window.title("Session Stats")
+        window.geometry("620x320")
+        frame = ttk.Frame(window, padding=8)
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        columns = Metrics.FIELDS[1:]
+        table = ttk.Treeview(frame, columns=columns, show="tree headings", selectmode="none")
+        table.heading("#0", text="Metric")
+        table.column("#0", width=200)
+        for column in columns:
+            table.heading(column, text=column.capitalize())
+            table.column(column, width=66, anchor=tk.E, stretch=False)
+        table.grid(row=0, column=0, sticky=tk.NSEW)
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=1, column=0, sticky=tk.E, pady=(8, 0))
+        ttk.Button(buttons, text="Reset", command=self.metrics.reset).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Export…", command=self.export_metrics).pack(side=tk.LEFT, padx=(4, 0))
+
+        def refresh() -> None:
+            if not window.winfo_exists():
+                return
+            table.delete(*table.get_children())
+            for row in self.metrics.snapshot():
+                values = [row["count"]] + [
+                    "" if row[column] is None else f"{row[column]:.4g}" for column in columns[1:]
+                ]
+                table.insert("", tk.END, text=row["name"], values=values)
+            window.after(STATS_REFRESH_MS, refresh)
+
+        refresh()
+
+    def export_metrics(self) -> None:
+        path = filedialog.asksaveasfilename(
+            title="Export session stats",
+            defaultextension=".json",
+            initialfile=time.strftime("stats-%Y%m%d-%H%M%S.json"),
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")],
+        )
+        if not path:
+            return
+        try:
+            self.metrics.export(path)
+        except OSError as exc:
+            messagebox.showerror("Export failed", f"Cannot write {path}: {exc}")
+            return
+        self.append_output(f"Session stats written to {path}.\n")
 
     def update_quality_state(self) -> None:
         state = "readonly" if self.mode_var.get() == "video" else "disabled"
         self.quality_box.configure(state=state)
+        audio_mode = self.mode_var.get() == "audio"
+        self.audio_format_box.configure(state="readonly" if audio_mode else "disabled")
+        format_info = AUDIO_FORMATS.get(self.audio_format_var.get())
+        bitrate_used = audio_mode and format_info is not None and format_info[2]
+        self.audio_bitrate_box.configure(state="readonly" if bitrate_used else "disabled")
+        self._refresh_current_archive()
+        self._refresh_size_estimate()
+
+    def estimate_sizes(self) -> None:
+        if self.prober is not None:
+            return
+        entries = self.playlist.checked_entries()
+        if not entries:
+            messagebox.showinfo("Estimate sizes", "Check the videos whose download size you want to estimate.")
+            return
+        targets = [(entry.video_id, entry.url) for entry in entries if entry.video_id not in self.format_probes]
+        if not targets:
+            self._refresh_size_estimate()
+            return
+        cookie_cache: Optional[BrowserCookieCache] = None
+        cookies_file: Optional[str] = None
+        if self.cookies_mode_var.get() == "browser":
+            browser_key = COOKIES_BROWSER_CHOICES.get(self.browser_var.get())
+            if browser_key:
+                cookie_cache = self.cookie_caches.setdefault(browser_key, BrowserCookieCache(browser_key))
+        else:
+            cookies_file = self.cookies_var.get().strip() or DEFAULT_COOKIES
+            if not os.path.isfile(cookies_file):
+                cookies_file = None
+        prober = self.prober = FormatProber(self.format_cache, cookies_file=cookies_file, cookie_cache=cookie_cache)
+        self.estimate_button.state(["disabled"])
+        self.playlist_status.configure(text=f"Probing formats for {len(targets)} video(s)…")
+
+        def on_result(video_id: str, probe: Optional[dict[str, Any]], error: Optional[str]) -> None:
+            if probe is not None:
+                self.format_probes[video_id] = probe
+            else:
+                self.append_output(f"Could not probe formats for {video_id}: {error}\n")
+            self.root.after(0, self._refresh_size_estimate)
+
+        def finish() -> None:
+            self.prober = None
+            self.estimate_button.state(["!disabled"])
+            self._refresh_size_estimate()
+
+        def worker() -> None:
+            prober.probe(targets, on_result)
+            self.root.after(0, finish)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _refresh_size_estimate(self) -> None:
+        if not self._estimate_pending:
+            self._estimate_pending = True
+            self.root.after_idle(self._update_size_estimate)
+
+    def _update_size_estimate(self) -> None:
+        self._estimate_pending = False
+        self._schedule_playlist_render()
+        if not self.format_probes or self.is_fetching:
+            return
+        mode = self.mode_var.get()
+        if mode == "subs":
+            return
+        quality = self.quality_var.get()
+        entries = self.playlist.checked_entries()
+        total = 0.0
+        unknown = 0
+        for entry in entries:
+            probe = self.format_probes.get(entry.video_id)
+            choice = choose_format(probe, mode, quality) if probe is not None else None
+            if choice is None or choice.size is None:
+                unknown += 1
+            else:
+                total += choice.size
+        known = len(entries) - unknown
+        text = f"Estimated {format_bytes(total)} for {known} of {len(entries)} checked video(s)"
+        if self.prober is not None:
+            text += " (still probing…)"
+        elif unknown:
+            text += f"; {unknown} not probed or without a size"
+        self.playlist_status.configure(text=text + ".")
+
+    def _pin_probed_formats(self, jobs: list[DownloadJob], mode: str) -> int:
+        """Point jobs at the exact formats probed earlier so yt-dlp need not resolve them again."""
+        missing = [job.video_id for job in jobs if job.video_id and job.video_id not in self.format_probes]
+        if missing:
+            try:
+                self.format_probes.update(self.format_cache.load_many(missing))
+            except (sqlite3.Error, ValueError) as exc:
+                self.append_output(f"Format cache unavailable: {exc}\n")
+        pinned = 0
+        for job in jobs:
+            probe = self.format_probes.get(job.video_id)
+            choice = choose_format(probe, mode, self.quality_var.get()) if probe is not None else None
+            if choice is not None:
+                job.cmd = pin_format(job.cmd, choice.format_id)
+                pinned += 1
+        return pinned
+
+    def _get_archive(self, output_dir: str, mode: str) -> DownloadArchive:
+        path = archive_path(output_dir, mode)
+        archive = self.archives.get(path)
+        if archive is None:
+            archive = self.archives[path] = DownloadArchive(path)
+        else:
+            archive.refresh()
+        return archive
+
+    def _refresh_current_archive(self) -> None:
+        self.current_archive = self._get_archive(self.output_var.get().strip(), self.mode_var.get())
+        self._schedule_playlist_render()
 
     def update_cookies_state(self) -> None:
         mode = self.cookies_mode_var.get()
@@ -334,125 +987,309 @@ class DownloaderUI:
         self.browser_combo.configure(state=browser_state)
 
     def fetch_playlist(self) -> None:
-        if self.is_running or self.is_fetching:
+        if self.is_fetching:
+            self.stop_fetch()
             return
-        url = self.url_var.get().strip()
-        if not url:
-            messagebox.showwarning("Missing URL", "Please paste a YouTube channel or playlist URL.")
+        if self.is_running:
+            return
+        urls = split_urls(self.url_var.get())
+        if not urls:
+            messagebox.showwarning("Missing URL", "Please paste one or more YouTube channel or playlist URLs.")
             return
 
         self.is_fetching = True
-        self.fetch_button.state(["disabled"])
+        self.fetch_stopped = False
+        self.fetch_button.configure(text="Stop")
         self.playlist_frame.grid()
         self.playlist_status.configure(text="Fetching video list...")
-        for item in self.playlist_tree.get_children():
-            self.playlist_tree.delete(item)
-        self.playlist_checks.clear()
-        self.playlist_item_urls.clear()
-
-        def worker() -> None:
+        self.playlist.clear()
+        self.playlist_offset = 0
+        self.playlist_cursor = 0
+        self.playlist_view = None
+        self._schedule_playlist_filter()
+
+        known_ids: dict[str, set[str]] = {}
+        for url in urls:
+            self.playlist.add_source(url)
+            # Ordinary playlists list oldest first, so new videos can be anywhere; fetch those in full.
+            if not lists_newest_first(url):
+                continue
             try:
-                process = subprocess.Popen(
-                    [YT_DLP_EXEC, "--flat-playlist", "--dump-json", url],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                )
-            except FileNotFoundError:
-                self.root.after(0, lambda: self.finish_fetch([], 1, "yt-dlp executable not found."))
-                return
+                cached = self.playlist_cache.load(url)
+            except (sqlite3.Error, ValueError) as exc:
+                self.append_output(f"Playlist cache unavailable: {exc}\n")
+                cached = None
+            if cached is not None and self.playlist_cache.is_fresh(cached[0]):
+                fetched_at, cached_videos = cached
+                self.playlist.extend(cached_videos, url)
+                known_ids[url] = {video["id"] for video in cached_videos}
+                age_minutes = int((time.time() - fetched_at) // 60)
+                self.append_output(f"Loaded {len(cached_videos)} cached videos for {url} ({age_minutes} min old).\n")
+        self._render_playlist()
+        if known_ids:
+            self.playlist_status.configure(
+                text=f"Loaded {len(self.playlist)} cached videos. "
+                f"Checking {len(known_ids)} source(s) for new uploads..."
+            )
 
-            videos: list[dict[str, str]] = []
-            for line in process.stdout or []:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                if data.get("_type") == "url":
-                    raw_url = data.get("url") or ""
-                    if raw_url.startswith("http"):
-                        video_url = raw_url
-                    else:
-                        video_url = f"https://www.youtube.com/watch?v={raw_url}"
-                    title = data.get("title") or video_url
-                    videos.append({"title": title, "url": video_url})
-
-            stderr_text = process.stderr.read() if process.stderr else ""
-            return_code = process.wait()
-            self.root.after(0, lambda: self.finish_fetch(videos, return_code, stderr_text))
+        fetcher = self.fetcher = PlaylistFetcher(worker_pool=self._get_worker_pool(), metrics=self.metrics)
+        # "New since last fetch" only means something when every source started from its cache.
+        cached_count = len(self.playlist) if len(known_ids) == len(urls) else 0
+        results: dict[str, tuple[int, str]] = {}
+
+        def on_videos(url: str, videos: list[dict[str, Any]], at_start: bool) -> None:
+            self.root.after(0, lambda: self.add_playlist_videos(url, videos, at_start))
+
+        def on_finished(url: str, return_code: int, stderr_text: str) -> None:
+            results[url] = (return_code, stderr_text)
+
+        def worker() -> None:
+            fetcher.fetch(urls, on_videos, on_finished, known_ids)
+            self.root.after(0, lambda: self.finish_fetch(urls, results, cached_count, set(known_ids)))
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def finish_fetch(self, videos: list[dict[str, str]], return_code: int, stderr_text: str) -> None:
+    def stop_fetch(self) -> None:
+        if self.fetch_stopped:
+            return
+        self.fetch_stopped = True
+        self.fetch_button.state(["disabled"])
+        if self.fetcher is not None:
+            self.fetcher.stop()
+
+    def add_playlist_videos(self, source: str, videos: list[dict[str, Any]], at_start: bool = False) -> None:
+        # Another source's videos may land above the visible rows; keep the same videos in view.
+        anchors = [
+            self.playlist.entries[index].video_id if index < len(self.playlist) else None
+            for index in (self.playlist_offset, self.playlist_cursor)
+        ]
+        if at_start:
+            added = self.playlist.prepend(videos, source)
+        else:
+            added = self.playlist.extend(videos, source)
+        if not added:
+            return
+        if self.playlist_view is not None:
+            self._schedule_playlist_filter()
+        else:
+            offset_id, cursor_id = anchors
+            if offset_id is not None:
+                self.playlist_offset = self.playlist.positions[offset_id]
+            if cursor_id is not None:
+                self.playlist_cursor = self.playlist.positions[cursor_id]
+        self._schedule_playlist_render()
+        if self.is_fetching:
+            self.playlist_status.configure(
+                text=f"Fetching video list... {len(self.playlist)} videos so far. You can start selecting."
+            )
+
+    def finish_fetch(
+        self,
+        urls: list[str],
+        results: dict[str, tuple[int, str]],
+        cached_count: int = 0,
+        refreshed: Optional[set[str]] = None,
+    ) -> None:
+        """``refreshed`` lists the sources that were only checked for uploads newer than their cache."""
         self.is_fetching = False
+        self.fetcher = None
+        self.fetch_button.configure(text="Fetch Videos")
         self.fetch_button.state(["!disabled"])
-        self.playlist_videos = videos
-        self.playlist_item_urls.clear()
-        self.playlist_checks.clear()
-        for item in self.playlist_tree.get_children():
-            self.playlist_tree.delete(item)
+        count = len(self.playlist)
+
+        if self.fetch_stopped:
+            self.playlist_status.configure(text=f"Stopped after {count} videos. Select the ones you need.")
+            return
 
-        if return_code != 0:
+        failed = [url for url in urls if results.get(url, (1, ""))[0] != 0]
+        for url in failed:
+            stderr_text = results.get(url, (1, ""))[1].strip()
+            self.append_output(f"Fetching {url} failed" + (f":\n{stderr_text}\n" if stderr_text else ".\n"))
+        for url in urls:
+            if url not in failed:
+                self._save_playlist_cache(url, full=url not in (refreshed or ()))
+
+        if failed and not count:
             self.playlist_status.configure(text="Failed to fetch videos. See log for details.")
-            if stderr_text:
-                self.append_output(stderr_text + "\n")
             messagebox.showerror("Fetch failed", "Unable to fetch playlist information. Check the log for details.")
-            if not videos:
-                self.playlist_frame.grid()
             return
-
-        if not videos:
-            self.playlist_status.configure(text="No videos found in this playlist/channel.")
+        if not count:
+            self.playlist_status.configure(text="No videos found in these playlists/channels.")
             return
 
-        for index, video in enumerate(videos, start=1):
-            item_id = self.playlist_tree.insert(
-                "",
-                tk.END,
-                text=f"{index}",
-                image=self.checkbox_images[False],
-                values=(video["title"],),
-            )
-            self.playlist_item_urls[item_id] = video["url"]
-            self.playlist_checks[item_id] = False
-        self.playlist_status.configure(text=f"Fetched {len(videos)} videos. Select the ones you need.")
+        parts = [f"{count} videos"]
+        if len(urls) > 1:
+            parts[0] += f" from {len(urls)} sources"
+        if self.playlist.duplicates:
+            parts.append(f"{self.playlist.duplicates} duplicates merged")
+        if cached_count:
+            parts.append(f"{count - cached_count} new since last fetch")
+        if failed:
+            parts.append(f"{len(failed)} source(s) failed, see log")
+        self.playlist_status.configure(text=f"{', '.join(parts)}. Select the ones you need.")
+
+    def _save_playlist_cache(self, url: str, full: bool = True) -> None:
+        entries = [entry.as_dict() for entry in self.playlist.source_entries(url)]
+
+        def worker() -> None:
+            try:
+                self.playlist_cache.save(url, entries, full)
+            except sqlite3.Error as exc:
+                self.append_output(f"Could not update playlist cache: {exc}\n")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def check_matching_playlist(self) -> None:
+        if self.playlist_view is None:
+            self.playlist.select_all()
+        else:
+            self.playlist.check_positions(self.playlist_view)
+        self._schedule_playlist_render()
+
+    def _schedule_playlist_filter(self) -> None:
+        if not self._filter_pending:
+            self._filter_pending = True
+            self.root.after_idle(self._apply_playlist_filter)
+
+    def _apply_playlist_filter(self) -> None:
+        self._filter_pending = False
+        text = self.filter_var.get()
+        query = parse_playlist_query(text)
+        self.playlist_view = None if query.is_empty else self.playlist.search(query)
+        if text != self._filter_text:
+            # Keep the scroll position when only the playlist grew, e.g. while fetching.
+            self._filter_text = text
+            self.playlist_offset = 0
+            self.playlist_cursor = 0
+        if not self.is_fetching and len(self.playlist):
+            if self.playlist_view is None:
+                self.playlist_status.configure(text=f"{len(self.playlist)} videos. Select the ones you need.")
+            else:
+                self.playlist_status.configure(
+                    text=f"{len(self.playlist_view)} of {len(self.playlist)} videos match the filter."
+                )
+        self._schedule_playlist_render()
+
+    def _view_size(self) -> int:
+        return len(self.playlist) if self.playlist_view is None else len(self.playlist_view)
+
+    def _view_position(self, row: int) -> int:
+        """Playlist position of a row in the (possibly filtered) view."""
+        return row if self.playlist_view is None else self.playlist_view[row]
 
     def select_all_playlist(self) -> None:
-        for item in self.playlist_tree.get_children():
-            self._set_playlist_item_checked(item, True)
+        self.playlist.select_all()
+        self._schedule_playlist_render()
 
     def clear_playlist_selection(self) -> None:
-        for item in self.playlist_tree.get_children():
-            self._set_playlist_item_checked(item, False)
+        self.playlist.clear_checked()
+        self._schedule_playlist_render()
+
+    def invert_playlist_selection(self) -> None:
+        self.playlist.invert()
+        self._schedule_playlist_render()
 
     def on_playlist_click(self, event: tk.Event) -> str | None:
         region = self.playlist_tree.identify("region", event.x, event.y)
         if region not in {"tree", "cell"}:
             return None
-        item = self.playlist_tree.identify_row(event.y)
-        if not item:
+        row_id = self.playlist_tree.identify_row(event.y)
+        if not row_id:
             return None
-        self._toggle_playlist_item(item)
+        index = self.playlist_offset + self._playlist_row_ids.index(row_id)
+        self.playlist_cursor = index
+        self.playlist_tree.focus_set()
+        self._toggle_playlist_item(index)
         return "break"
 
     def on_playlist_key_toggle(self, event: tk.Event) -> str:
-        focused = self.playlist_tree.focus()
-        if focused:
-            self._toggle_playlist_item(focused)
+        self._toggle_playlist_item(self.playlist_cursor)
         return "break"
 
-    def _toggle_playlist_item(self, item_id: str) -> None:
-        current = self.playlist_checks.get(item_id, False)
-        self._set_playlist_item_checked(item_id, not current)
+    def on_playlist_wheel(self, event: tk.Event) -> str:
+        delta = event.delta if abs(event.delta) < 120 else event.delta // 120
+        return self.scroll_playlist(-delta)
 
-    def _set_playlist_item_checked(self, item_id: str, checked: bool) -> None:
-        if item_id not in self.playlist_item_urls:
-            return
-        self.playlist_checks[item_id] = checked
-        self.playlist_tree.item(item_id, image=self.checkbox_images[checked])
+    def on_playlist_scrollbar(self, action: str, amount: str, unit: str = "") -> None:
+        total = self._view_size()
+        if action == "moveto":
+            self.playlist_offset = int(float(amount) * total)
+        elif unit == "pages":
+            self.playlist_offset += int(amount) * PLAYLIST_VISIBLE_ROWS
+        else:
+            self.playlist_offset += int(amount)
+        self._schedule_playlist_render()
+
+    def scroll_playlist(self, rows: int) -> str:
+        self.playlist_offset += rows
+        self._schedule_playlist_render()
+        return "break"
+
+    def move_playlist_cursor(self, rows: int) -> str:
+        total = self._view_size()
+        if not total:
+            return "break"
+        self.playlist_cursor = max(0, min(self.playlist_cursor + rows, total - 1))
+        if self.playlist_cursor < self.playlist_offset:
+            self.playlist_offset = self.playlist_cursor
+        elif self.playlist_cursor >= self.playlist_offset + PLAYLIST_VISIBLE_ROWS:
+            self.playlist_offset = self.playlist_cursor - PLAYLIST_VISIBLE_ROWS + 1
+        self._schedule_playlist_render()
+        return "break"
+
+    def _toggle_playlist_item(self, row: int) -> None:
+        if 0 <= row < self._view_size():
+            self.playlist.toggle(self._view_position(row))
+            self._schedule_playlist_render()
+
+    def _set_playlist_item_status(self, video_id: str, state: str) -> None:
+        entry = self.playlist.get(video_id)
+        if entry is not None:
+            entry.status = state
+            self._schedule_playlist_render()
+
+    def _schedule_playlist_render(self) -> None:
+        if not self._playlist_render_pending:
+            self._playlist_render_pending = True
+            self.root.after_idle(self._render_playlist)
+
+    def _render_playlist(self) -> None:
+        self._playlist_render_pending = False
+        total = self._view_size()
+        self.playlist_offset = max(0, min(self.playlist_offset, total - PLAYLIST_VISIBLE_ROWS))
+        offset = self.playlist_offset
+        visible = min(PLAYLIST_VISIBLE_ROWS, total - offset)
+        mode = self.mode_var.get()
+        quality = self.quality_var.get()
+        for row, row_id in enumerate(self._playlist_row_ids):
+            if row < visible:
+                index = self._view_position(offset + row)
+                entry = self.playlist.entries[index]
+                status = entry.status or ("archived" if entry.video_id in self.current_archive else "")
+                upload_date = entry.upload_date
+                if len(upload_date) == 8:
+                    upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:]}"
+                duration = format_duration(entry.duration) if entry.duration is not None else ""
+                probe = self.format_probes.get(entry.video_id)
+                choice = choose_format(probe, mode, quality) if probe is not None else None
+                size = format_bytes(choice.size) if choice is not None else ""
+                self.playlist_tree.item(
+                    row_id,
+                    text=f"{index + 1}",
+                    image=self.checkbox_images[self.playlist.is_checked(index)],
+                    values=(entry.title, source_label(entry.source), duration, upload_date, size, status),
+                )
+                if row >= self._playlist_rows_shown:
+                    self.playlist_tree.reattach(row_id, "", row)
+            elif row < self._playlist_rows_shown:
+                self.playlist_tree.detach(row_id)
+        self._playlist_rows_shown = visible
+        if offset <= self.playlist_cursor < offset + visible:
+            self.playlist_tree.focus(self._playlist_row_ids[self.playlist_cursor - offset])
+        if total:
+            self.playlist_scroll.set(offset / total, (offset + visible) / total)
+        else:
+            self.playlist_scroll.set(0.0, 1.0)
 
     def _create_checkbox_image(self, checked: bool) -> tk.PhotoImage:
         size = 14
@@ -490,27 +1327,39 @@ class DownloaderUI:
         paths = filedialog.askopenfilenames(
             title="Select subtitle files",
             filetypes=[
-                ("Subtitle files", "*.srt *.vtt *.ass *.sbv *.ttml *.json"),
+                ("Subtitle files", " ".join(f"*{ext}" for ext in SUBTITLE_EXTENSIONS)),
                 ("All files", "*"),
             ],
         )
         if not paths:
             return
+        self._run_subtitle_conversion(lambda: list(paths))
 
-        self.append_output(f"Converting {len(paths)} subtitle file(s) to text…\n")
+    def convert_subtitle_folder(self) -> None:
+        directory = filedialog.askdirectory(title="Select a folder of subtitle files")
+        if not directory:
+            return
+        self.append_output(f"Scanning {directory} for subtitle files…\n")
+
+        def collect() -> list[str]:
+            found = find_subtitle_files(directory)
+            pending = [path for path in found if not is_text_current(path)]
+            if len(found) != len(pending):
+                self.append_output(f"Skipping {len(found) - len(pending)} file(s) with an up-to-date .txt.\n")
+            return pending
+
+        self._run_subtitle_conversion(collect)
 
+    def _run_subtitle_conversion(self, collect: Callable[[], list[str]]) -> None:
         def worker() -> None:
-            success = 0
-            failures: list[tuple[str, Exception]] = []
-            for path in paths:
-                try:
-                    output_path = self._subtitle_to_text(path)
-                except Exception as exc:  # noqa: BLE001
-                    failures.append((path, exc))
-                    self.append_output(f"Failed: {path} -> {exc}\n")
-                else:
-                    success += 1
-                    self.append_output(f"Converted: {path} -> {output_path}\n")
+            paths = collect()
+            total = len(paths)
+            self.append_output(f"Converting {total} subtitle file(s) to text…\n")
+            indexer = TranscriptIndexer(self.transcript_index, self.on_transcript_indexed, self.metrics)
+            success, failures = self._collect_conversions(
+                convert_subtitle_files(paths, metrics=self.metrics), total, indexer
+            )
+            indexer.close()
 
             def finish() -> None:
                 if failures:
@@ -528,60 +1377,147 @@ class DownloaderUI:
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def _subtitle_to_text(self, path: str) -> str:
-        _, ext = os.path.splitext(path)
-        ext = ext.lower()
-        with open(path, "r", encoding="utf-8", errors="replace") as fh:
-            raw_lines = fh.readlines()
-
-        text_lines: list[str] = []
-        for raw in raw_lines:
-            line = raw.strip()
-            if not line:
-                if text_lines and text_lines[-1] != "":
-                    text_lines.append("")
-                continue
-            upper = line.upper()
-            if ext in {".srt", ".vtt", ".sbv", ".ttml"}:
-                if line.isdigit():
-                    continue
-                if "-->" in line:
-                    continue
-                if upper.startswith("WEBVTT") or upper.startswith("NOTE"):
-                    continue
-            line = re.sub(r"<[^>]+>", "", line)
-            line = html.unescape(line)
-            if line:
-                text_lines.append(line)
-
-        cleaned: list[str] = []
-        previous_blank = False
-        seen_lines: set[str] = set()
-        for line in text_lines:
-            normalized = line.strip().lower()
-            if not line:
-                if previous_blank:
-                    continue
-                previous_blank = True
+    def _collect_conversions(
+        self,
+        results: Iterable[tuple[str, Optional[str], Optional[str]]],
+        total: int,
+        indexer: Optional[TranscriptIndexer] = None,
+    ) -> tuple[int, list[tuple[str, str]]]:
+        success = 0
+        failures: list[tuple[str, str]] = []
+        for done, (path, output_path, error) in enumerate(results, start=1):
+            if error is None:
+                success += 1
+                self.append_output(f"[{done}/{total}] Converted: {path} -> {output_path}\n")
+                if indexer is not None:
+                    indexer.submit([path])
             else:
-                previous_blank = False
-                if normalized in seen_lines:
-                    continue
-                seen_lines.add(normalized)
-            cleaned.append(line)
+                failures.append((path, error))
+                self.append_output(f"[{done}/{total}] Failed: {path} -> {error}\n")
+        return success, failures
+
+    def open_transcript_search(self) -> None:
+        if self.search_window is not None and self.search_window.winfo_exists():
+            self.search_window.deiconify()
+            self.search_window.lift()
+            return
+        window = self.search_window = tk.Toplevel(self.root)
+        window.title("Search Transcripts")
+        window.geometry("640x420")
+        frame = ttk.Frame(window, padding=8)
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(1, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        query_var = tk.StringVar()
+        ttk.Label(frame, text="Find:").grid(row=0, column=0, sticky=tk.W)
+        query_entry = ttk.Entry(frame, textvariable=query_var)
+        query_entry.grid(row=0, column=1, sticky=tk.EW, padx=4)
+        query_entry.focus()
+        results = ttk.Treeview(frame, columns=("time", "text"), show="tree headings", selectmode="browse")
+        results.heading("#0", text="Video")
+        results.column("#0", width=200)
+        results.heading("time", text="Time")
+        results.column("time", width=64, anchor=tk.E, stretch=False)
+        results.heading("text", text="Passage")
+        results.column("text", width=340)
+        results.grid(row=1, column=0, columnspan=4, sticky=tk.NSEW, pady=(8, 0))
+        scroll = ttk.Scrollbar(frame, command=results.yview)
+        scroll.grid(row=1, column=4, sticky=tk.NS, pady=(8, 0))
+        results.configure(yscrollcommand=scroll.set)
+        status = ttk.Label(frame, text="Double-click a passage to open the video at that moment.")
+        status.grid(row=2, column=0, columnspan=4, sticky=tk.W, pady=(8, 0))
+        links: dict[str, str] = {}
+
+        def show(matches: list[Any], elapsed: float) -> None:
+            results.delete(*results.get_children())
+            links.clear()
+            hits = 0
+            for match in matches:
+                parent = results.insert("", tk.END, text=match.title or match.video_id, open=True)
+                for start, text in match.hits:
+                    item = results.insert(
+                        parent,
+                        tk.END,
+                        values=(format_duration(start) if start is not None else "", text),
+                    )
+                    if match.video_id:
+                        links[item] = timestamp_url(match.video_id, start)
+                    hits += 1
+            status.configure(text=f"{hits} passage(s) in {len(matches)} transcript(s) ({elapsed * 1000:.0f} ms).")
 
-        output_text = "\n".join(cleaned).strip() + "\n"
-        output_path = os.path.splitext(path)[0] + ".txt"
-        with open(output_path, "w", encoding="utf-8") as fh:
-            fh.write(output_text)
-        return output_path
+        def search() -> None:
+            text = query_var.get()
+
+            def worker() -> None:
+                started = time.monotonic()
+                try:
+                    matches = self.transcript_index.search(text)
+                except (sqlite3.Error, ValueError) as exc:
+                    message = str(exc)
+                    self.root.after(0, lambda: status.configure(text=message))
+                    return
+                elapsed = time.monotonic() - started
+                self.root.after(0, lambda: show(matches, elapsed))
+
+            threading.Thread(target=worker, daemon=True).start()
+
+        def open_link(event: tk.Event) -> None:
+            url = links.get(results.identify_row(event.y))
+            if url:
+                webbrowser.open(url)
+
+        query_entry.bind("<Return>", lambda event: search())
+        results.bind("<Double-1>", open_link)
+        ttk.Button(frame, text="Search", command=search).grid(row=0, column=2)
+        ttk.Button(frame, text="Index Folder…", command=self.index_transcript_folder).grid(
+            row=0, column=3, padx=(4, 0)
+        )
+
+    def index_transcript_folder(self) -> None:
+        directory = filedialog.askdirectory(title="Select a folder of subtitle files to index")
+        if not directory:
+            return
+
+        def worker() -> None:
+            try:
+                removed = self.transcript_index.prune(directory)
+            except sqlite3.Error as exc:
+                self.append_output(f"Cannot open transcript index: {exc}\n")
+                return
+            paths = find_subtitle_files(directory)
+            self.append_output(f"Indexing {len(paths)} subtitle file(s) under {directory}…\n")
+            indexer = TranscriptIndexer(self.transcript_index, self.on_transcript_indexed, self.metrics)
+            indexer.submit(paths)
+            indexer.close()
+            removed_text = f", {removed} removed" if removed else ""
+            self.append_output(
+                f"Transcript index updated: {indexer.converted} file(s) indexed or unchanged, "
+                f"{indexer.failed} failed{removed_text}.\n"
+            )
+
+        threading.Thread(target=worker, daemon=True).start()
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="YouTube downloader GUI around yt-dlp.")
+    parser.add_argument(
+        "--log-lines",
+        type=int,
+        default=LOG_MAX_LINES,
+        help=f"maximum number of lines kept in the log view (default: {LOG_MAX_LINES})",
+    )
+    parser.add_argument("--log-file", help="also write the full log to this file, rotating it as it grows")
+    args, _ = parser.parse_known_args()
+
     root = tk.Tk()
-    DownloaderUI(root)
+    ui = DownloaderUI(root, log_max_lines=args.log_lines, log_file=args.log_file)
     root.mainloop()
+    ui.log_buffer.close()
+    if ui.worker_pool is not None:
+        ui.worker_pool.close()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
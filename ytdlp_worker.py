@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Resident yt-dlp worker: import yt_dlp once, then run one command line per request read from stdin.
+
+Each request is a JSON array of yt-dlp arguments on its own line. The job's output is written to
+stdout as yt-dlp produces it and is followed by ``WORKER_EXIT_MARKER`` and the exit code.
+"""
+import json
+import os
+import sys
+import traceback
+
+import yt_dlp
+
+from downloader_core import WORKER_EXIT_MARKER
+
+
+def run_job(args: list[str]) -> int:
+    try:
+        yt_dlp.main(args)
+    except SystemExit as exc:
+        if exc.code is None or isinstance(exc.code, int):
+            return exc.code or 0
+        print(exc.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def serve() -> None:
+    requests = sys.stdin
+    # yt-dlp must never read job requests as its own input.
+    sys.stdin = open(os.devnull, "r")
+    sys.stdout.reconfigure(line_buffering=True)
+    for line in requests:
+        try:
+            args = json.loads(line)
+        except ValueError:
+            continue
+        return_code = run_job([str(arg) for arg in args])
+        sys.stderr.flush()
+        sys.stdout.write(f"{WORKER_EXIT_MARKER}{return_code}\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    serve()